@@ -1,9 +1,10 @@
 import streamlit as st
 import logging
 from typing import List, Optional
-from datetime import datetime
 import time
-from model.base import get_database, initialize_database, database_connection
+from peewee import JOIN, DatabaseError, IntegrityError, OperationalError
+from model.base import get_database, database_connection, reintentar_si_bloqueada
+from model.database_schema import crear_indices, crear_busquedas_texto
 from model.frecuencia import Frecuencia
 from model.tipo import Tipo
 from model.fuente import Fuente, Clasifica, Maneja
@@ -17,27 +18,37 @@ from model.usuario import Usuario, Personaliza
 # Configuración de la página
 st.set_page_config(page_title="Consola de Audio", layout="wide")
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configurar logging solo la primera vez; Streamlit re-ejecuta este script
+# en cada rerun
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 logger = logging.getLogger(__name__)
 
+# Número máximo de opciones que se envían a un selectbox en cada rerun
+MAX_OPCIONES_SELECTBOX = 50
+
 # Usar @st.cache_resource para mantener la conexión viva
 @st.cache_resource
 def init_db():
     """
     Inicializa y retorna la conexión a la base de datos.
     """
-    return get_database()
+    database = get_database()
+    with database_connection():
+        crear_indices(database)
+        crear_busquedas_texto(database)
+    return database
 
 # Inicializar la base de datos al inicio
 db = init_db()
 
-# Función para crear estilos personalizados
-def custom_css():
-    return """
+# Estilos personalizados. Se definen una sola vez al importar el módulo; hay
+# que emitirlos en cada rerun porque Streamlit elimina los elementos que no
+# se vuelven a dibujar.
+CUSTOM_CSS = """
     <style>
     .custom-card {
         border-radius: 10px;
@@ -67,331 +78,542 @@ def custom_css():
     </style>
     """
 
-def obtener_usuarios() -> List[Usuario]:
+# Plantilla HTML de la tarjeta de la interfaz de audio
+TARJETA_INTERFAZ = """
+<div class="custom-card">
+    <div class="card-header">
+        <h3>Interfaz de Audio: {nombre_comercial}</h3>
+    </div>
+    <div class="card-body">
+        <p><b>Modelo:</b> {modelo}</p>
+    </div>
+</div>
+"""
+
+@st.cache_data(ttl=300)
+def obtener_usuarios() -> List[dict]:
+    """
+    Obtiene todos los usuarios del sistema como diccionarios con su ID y email.
+    """
+    with database_connection():
+        return list(Usuario
+                    .select(Usuario.id_usuario, Usuario.email)
+                    .order_by(Usuario.id_usuario)
+                    .dicts())
+
+@st.cache_data(ttl=300)
+def obtener_frecuencias() -> List[dict]:
+    """
+    Obtiene todas las frecuencias disponibles como diccionarios.
+    """
+    with database_connection():
+        return list(Frecuencia
+                    .select(Frecuencia.id_frecuencia, Frecuencia.valor)
+                    .order_by(Frecuencia.id_frecuencia)
+                    .dicts())
+
+@st.cache_data(ttl=300)
+def obtener_dispositivos() -> List[dict]:
+    """
+    Obtiene todos los dispositivos disponibles como diccionarios.
+    """
+    with database_connection():
+        return list(Dispositivo
+                    .select(Dispositivo.id_dispositivo, Dispositivo.nombre)
+                    .order_by(Dispositivo.id_dispositivo)
+                    .dicts())
+
+@st.cache_data(ttl=60)
+def buscar_dispositivos(busqueda: str) -> List[dict]:
     """
-    Obtiene todos los usuarios del sistema.
+    Obtiene como máximo MAX_OPCIONES_SELECTBOX dispositivos cuyo nombre
+    contiene el texto buscado, filtrando en la base de datos.
     """
     with database_connection():
-        return list(Usuario.select())
+        return list(Dispositivo
+                    .buscar_por_nombre(busqueda)
+                    .select(Dispositivo.id_dispositivo, Dispositivo.nombre)
+                    .limit(MAX_OPCIONES_SELECTBOX)
+                    .dicts())
+
+@st.cache_data(ttl=300)
+def obtener_tipos() -> List[dict]:
+    """
+    Obtiene todos los tipos de fuente disponibles como diccionarios.
+    """
+    with database_connection():
+        return list(Tipo
+                    .select(Tipo.id_tipo, Tipo.nombre)
+                    .order_by(Tipo.id_tipo)
+                    .dicts())
 
-def obtener_configuracion_usuario(usuario: Usuario) -> Optional[Configuracion]:
+@st.cache_data(ttl=300)
+def obtener_fuentes_por_tipo() -> dict:
+    """
+    Obtiene los IDs de las fuentes agrupados por el ID de su tipo, en una
+    sola consulta.
+    """
+    fuentes_por_tipo = {}
+    with database_connection():
+        consulta = (Fuente
+                    .select(Fuente.id_fuente, Clasifica.tipo)
+                    .join(Clasifica, on=(Clasifica.fuente == Fuente.id_fuente))
+                    .tuples())
+        for id_fuente, id_tipo in consulta:
+            fuentes_por_tipo.setdefault(id_tipo, []).append(id_fuente)
+    return fuentes_por_tipo
+
+def obtener_configuracion_usuario(id_usuario: int) -> Optional[Configuracion]:
     """
     Obtiene la última configuración del usuario.
     """
+    try:
+        return (Configuracion
+                .select()
+                .join(
+                    Personaliza,
+                    on=(Configuracion.id_configuracion == Personaliza.configuracion)
+                )
+                .where(Personaliza.usuario == id_usuario)
+                .order_by(Configuracion.fecha.desc())
+                .first())
+    except DatabaseError as e:
+        logger.error(f"Error al obtener configuración: {str(e)}")
+        return None
+
+def obtener_conexiones_entradas(configuracion: Configuracion) -> List[dict]:
+    """
+    Obtiene las entradas de una configuración con el ID de su dispositivo
+    conectado, en una sola consulta.
+    """
+    return list(Conectado
+                .select(
+                    Entrada.id_entrada,
+                    Conectado.dispositivo.alias('id_dispositivo')
+                )
+                .join(Entrada, on=(Conectado.entrada == Entrada.id_entrada))
+                .where(Conectado.configuracion == configuracion.id_configuracion)
+                .dicts())
+
+@st.cache_data(ttl=30, hash_funcs={Configuracion: lambda c: c.id_configuracion})
+def obtener_canales_configuracion(configuracion: Configuracion) -> List[dict]:
+    """
+    Obtiene los canales de una configuración como diccionarios planos con la
+    fuente asignada, su tipo y sus parámetros, en una sola consulta.
+    """
+    # Primer tipo de la fuente, igual que Fuente.get_tipo()
+    tipo_fuente = (Clasifica
+                   .select(Clasifica.tipo)
+                   .where(Clasifica.fuente == Establece.fuente)
+                   .limit(1))
+
     with database_connection():
-        try:
-            return (Configuracion
-                    .select()
-                    .join(
-                        Personaliza,
-                        on=(Configuracion.id_configuracion == Personaliza.configuracion)
+        return list(Establece
+                    .select(
+                        Canal.codigo_canal,
+                        Canal.etiqueta,
+                        Establece.fuente.alias('id_fuente'),
+                        tipo_fuente.alias('id_tipo'),
+                        Establece.volumen,
+                        Establece.solo,
+                        Establece.mute,
+                        Establece.link
                     )
-                    .where(Personaliza.usuario == usuario.id_usuario)
-                    .order_by(Configuracion.fecha.desc())
-                    .first())
-        except Exception as e:
-            logger.error(f"Error al obtener configuración: {str(e)}")
-            return None
+                    .join(Canal, on=(Establece.canal == Canal.codigo_canal))
+                    .where(Establece.configuracion == configuracion.id_configuracion)
+                    .dicts())
 
-def obtener_parametros_canal(canal: Canal, configuracion: Configuracion) -> dict:
+@st.cache_data(ttl=60, hash_funcs={Configuracion: lambda c: c.id_configuracion})
+def obtener_interfaz_configuracion(configuracion: Configuracion) -> Optional[dict]:
     """
-    Obtiene los parámetros de un canal para una configuración específica.
+    Obtiene los datos de la interfaz de una configuración junto con el ID de
+    su frecuencia actual, en una sola consulta.
     """
     with database_connection():
-        try:
-            establece = (Establece
-                        .get((Establece.canal == canal) &
-                                (Establece.configuracion == configuracion)))
-            return {
-                'Volumen': establece.volumen,
-                'Solo': establece.solo,
-                'Mute': establece.mute,
-                'Link': establece.link
-            }
-        except Establece.DoesNotExist:
-            return {
-                'Volumen': 0,
-                'Solo': False,
-                'Mute': False,
-                'Link': False
-        }
+        return (InterfazAudio
+                .select(
+                    InterfazAudio.id_interfaz,
+                    InterfazAudio.nombre_comercial,
+                    InterfazAudio.modelo,
+                    InterfazFrecuencia.frecuencia.alias('id_frecuencia')
+                )
+                .join(Personaliza, on=(Personaliza.interfaz == InterfazAudio.id_interfaz))
+                .switch(InterfazAudio)
+                .join(
+                    InterfazFrecuencia,
+                    JOIN.LEFT_OUTER,
+                    on=(InterfazFrecuencia.interfaz == InterfazAudio.id_interfaz)
+                )
+                .where(Personaliza.configuracion == configuracion.id_configuracion)
+                .dicts()
+                .first())
+
+# Parámetro del formulario -> (campo de Establece, clave en los valores guardados)
+CAMPOS_CANAL = (
+    ('volumen', Establece.volumen, 'volumen'),
+    ('solo', Establece.solo, 'solo'),
+    ('mute', Establece.mute, 'mute'),
+    ('link', Establece.link, 'link'),
+    ('fuente_id', Establece.fuente, 'id_fuente')
+)
 
-def guardar_cambios(configuracion: Configuracion, frecuencia: Frecuencia, entradas_data: dict, canales_data: dict) -> bool:
+@reintentar_si_bloqueada
+def escribir_cambios(configuracion: Configuracion, id_frecuencia: int, entradas_data: dict, canales_data: dict) -> None:
     """
-    Guarda los cambios realizados en la configuración.
+    Escribe los cambios de la configuración en una sola transacción.
+    
+    Los valores guardados se leen dentro de la transacción, con el bloqueo
+    de escritura ya tomado, y solo se escribe lo que difiere de ellos. No se
+    usan las cachés de st.cache_data, que pueden no reflejar escrituras de
+    otros procesos.
     
     Args:
         configuracion: Configuración actual
-        frecuencia: Nueva frecuencia seleccionada
-        entradas_data: Diccionario con los cambios en las entradas
-        canales_data: Diccionario con los cambios en los canales
+        id_frecuencia: ID de la nueva frecuencia seleccionada
+        entradas_data: Diccionario con el dispositivo seleccionado para cada entrada
+        canales_data: Diccionario con los parámetros seleccionados para cada canal
     """
-    try:
-        with database_connection():
-            # 1. Actualizar la frecuencia de la interfaz
-            interfaz = configuracion.get_interfaz()
-            if interfaz:
+    # Una sola transacción para todas las escrituras del guardado
+    with database_connection() as database, database.atomic('IMMEDIATE'):
+        # 1. Actualizar la frecuencia de la interfaz
+        id_interfaz = (Personaliza
+                       .select(Personaliza.interfaz)
+                       .where(Personaliza.configuracion == configuracion.id_configuracion)
+                       .scalar())
+        if id_interfaz is not None:
+            frecuencias_actuales = [
+                id_actual for id_actual, in InterfazFrecuencia
+                .select(InterfazFrecuencia.frecuencia)
+                .where(InterfazFrecuencia.interfaz == id_interfaz)
+                .tuples()
+            ]
+            if frecuencias_actuales != [id_frecuencia]:
                 # Eliminar las frecuencias existentes
                 InterfazFrecuencia.delete().where(
-                    InterfazFrecuencia.interfaz == interfaz.id_interfaz
+                    InterfazFrecuencia.interfaz == id_interfaz
                 ).execute()
                 
                 # Crear nueva relación con la frecuencia seleccionada
                 InterfazFrecuencia.create(
-                    interfaz=interfaz.id_interfaz,
-                    frecuencia=frecuencia.id_frecuencia
+                    interfaz=id_interfaz,
+                    frecuencia=id_frecuencia
                 )
 
-            # 2. Actualizar dispositivos en entradas
-            for entrada_id, dispositivo_id in entradas_data.items():
-                entrada = Entrada.get_by_id(entrada_id)
-                if entrada:
-                    entrada.set_dispositivo_configuracion(
-                        configuracion.id_configuracion,
-                        dispositivo_id
-                    )
+        # 2. Reemplazar los dispositivos de las entradas que cambiaron
+        dispositivos_actuales = dict(Conectado
+                                     .select(Conectado.entrada, Conectado.dispositivo)
+                                     .where(Conectado.configuracion == configuracion.id_configuracion)
+                                     .tuples())
+        cambios_entradas = {
+            id_entrada: id_dispositivo
+            for id_entrada, id_dispositivo in entradas_data.items()
+            if dispositivos_actuales.get(id_entrada) != id_dispositivo
+        }
+        if cambios_entradas:
+            configuracion.set_dispositivos_entradas(cambios_entradas)
+
+        # 3. Actualizar parámetros de canales, escribiendo solo las
+        # columnas que difieren de los valores guardados
+        canales_actuales = {
+            canal['codigo_canal']: canal
+            for canal in Establece
+            .select(
+                Establece.canal.alias('codigo_canal'),
+                Establece.fuente.alias('id_fuente'),
+                Establece.volumen,
+                Establece.solo,
+                Establece.mute,
+                Establece.link
+            )
+            .where(Establece.configuracion == configuracion.id_configuracion)
+            .dicts()
+        }
+        cambios_por_canal = {}
+        for canal_id, params in canales_data.items():
+            actual = canales_actuales.get(canal_id, {})
+            cambios = {
+                campo.name: params[clave]
+                for clave, campo, columna in CAMPOS_CANAL
+                if clave in params and actual.get(columna) != params[clave]
+            }
+            if cambios:
+                cambios_por_canal[canal_id] = cambios
 
-            # 3. Actualizar parámetros de canales
-            for canal_id, params in canales_data.items():
-                canal = Canal.get_by_id(canal_id)
-                if canal:
-                    # Actualizar fuente si se especificó
-                    if 'fuente_id' in params:
-                        Establece.update(
-                            fuente=params['fuente_id']
-                        ).where(
-                            (Establece.canal == canal) &
-                            (Establece.configuracion == configuracion)
-                        ).execute()
-                    
-                    # Actualizar parámetros del canal
-                    Establece.update({
-                        Establece.volumen: params.get('volumen', 0),
-                        Establece.solo: params.get('solo', False),
-                        Establece.mute: params.get('mute', False),
-                        Establece.link: params.get('link', False)
-                    }).where(
-                        (Establece.canal == canal) &
-                        (Establece.configuracion == configuracion)
-                    ).execute()
-
-            return True
-    except Exception as e:
+        if cambios_por_canal:
+            configuracion.actualizar_parametros_canales(cambios_por_canal)
+
+def guardar_cambios(configuracion: Configuracion, id_frecuencia: int, entradas_data: dict, canales_data: dict) -> bool:
+    """
+    Guarda los cambios realizados en la configuración.
+    
+    Args:
+        configuracion: Configuración actual
+        id_frecuencia: ID de la nueva frecuencia seleccionada
+        entradas_data: Diccionario con el dispositivo seleccionado para cada entrada
+        canales_data: Diccionario con los parámetros seleccionados para cada canal
+        
+    Returns:
+        bool: True si los cambios se guardaron
+    """
+    try:
+        escribir_cambios(configuracion, id_frecuencia, entradas_data, canales_data)
+    except IntegrityError as e:
+        logger.error(f"Los cambios no cumplen las restricciones de la base de datos: {e}")
+        return False
+    except OperationalError as e:
+        logger.error(f"No se pudo escribir en la base de datos: {e}")
+        return False
+    except DatabaseError as e:
         logger.error(f"Error al guardar cambios: {e}")
         return False
+
+    # Invalidar las cachés que dependen de la configuración guardada
+    obtener_canales_configuracion.clear()
+    obtener_interfaz_configuracion.clear()
+    st.session_state.pop('clave_configuracion', None)
+    return True
     
-def get_nombre_fuente(fuente):
+def limitar_opciones(opciones: list, actual=None) -> list:
+    """
+    Recorta las opciones a MAX_OPCIONES_SELECTBOX, conservando siempre la
+    opción actual.
+    """
+    limitadas = opciones[:MAX_OPCIONES_SELECTBOX]
+    if actual is not None and actual not in limitadas:
+        limitadas.append(actual)
+    return limitadas
+
+def posicion_opcion(opciones: list, actual) -> int:
     """
-    Obtiene el nombre formateado de una fuente.
+    Retorna la posición de `actual` en `opciones`, o 0 si no está, con un
+    solo recorrido de la lista.
     """
-    if not fuente:
-        return "Sin fuente"
     try:
-        with database_connection():
-            tipo = fuente.get_tipo()
-            if tipo and hasattr(tipo, 'nombre'):
-                return tipo.nombre
-            return "Fuente sin tipo"
-    except Exception as e:
-        logger.error(f"Error al obtener nombre de fuente: {e}")
-        return "Error al obtener tipo"
+        return opciones.index(actual)
+    except ValueError:
+        return 0
+
+def render_entrada(id_entrada: int, id_dispositivo_actual: Optional[int], dispositivos: List[dict], indice_dispositivos: dict) -> int:
+    """
+    Dibuja la tarjeta de una entrada y retorna el ID del dispositivo seleccionado.
+    """
+    with st.container(border=True):
+        st.subheader(f"Entrada {id_entrada}")
+
+        opciones = dispositivos
+        indice = indice_dispositivos.get(id_dispositivo_actual, 0)
+
+        # Con muchos dispositivos, mostrar solo los que coinciden con la búsqueda
+        if len(dispositivos) > MAX_OPCIONES_SELECTBOX:
+            busqueda = st.text_input(
+                'Buscar dispositivo:',
+                key=f'buscar_dispositivo_{id_entrada}'
+            ).strip()
+            posicion_actual = indice_dispositivos.get(id_dispositivo_actual)
+            dispositivo_actual = dispositivos[posicion_actual] if posicion_actual is not None else None
+            # Sin búsqueda se recortan los dispositivos ya cargados sin consultar
+            encontrados = buscar_dispositivos(busqueda) if busqueda else dispositivos
+            opciones = limitar_opciones(encontrados, dispositivo_actual)
+            indice = posicion_opcion(opciones, dispositivo_actual)
+
+        dispositivo_seleccionado = st.selectbox(
+            'Dispositivo:',
+            options=opciones,
+            index=indice,
+            format_func=lambda x: x['nombre'],
+            key=f'dispositivo_{id_entrada}'
+        )
+
+    return dispositivo_seleccionado['id_dispositivo']
+
+def render_canal(canal: dict, tipos: List[dict], indice_tipos: dict, fuentes_por_tipo: dict) -> dict:
+    """
+    Dibuja la tarjeta de un canal y retorna los parámetros seleccionados.
+    """
+    codigo_canal = canal['codigo_canal']
+    with st.container(border=True):
+        st.subheader(f"Canal {codigo_canal}")
+
+        fuente_actual = canal['id_fuente']
+
+        # Obtener tipo actual si existe
+        id_tipo_actual = canal['id_tipo']
+
+        # Selector de tipo
+        tipo_seleccionado = st.selectbox(
+            'Tipo:',
+            options=tipos,
+            index=indice_tipos.get(id_tipo_actual, 0),
+            format_func=lambda x: f"{x['id_tipo']}" if x else "Sin tipo",  # Modificado para mostrar el ID
+            key=f'tipo_{codigo_canal}'
+        )
+
+        # Fuentes del tipo seleccionado, limitando el número de opciones
+        fuentes_filtradas = []
+        if tipo_seleccionado:
+            mismo_tipo = id_tipo_actual == tipo_seleccionado['id_tipo']
+            fuentes_filtradas = limitar_opciones(
+                fuentes_por_tipo.get(tipo_seleccionado['id_tipo'], []),
+                fuente_actual if mismo_tipo else None
+            )
+
+        # Si no hay fuentes filtradas, mostrar opción vacía
+        if not fuentes_filtradas:
+            fuentes_filtradas = [None]
+            fuente_actual = None
+
+        fuente_seleccionada = st.selectbox(
+            'Fuente:',
+            options=fuentes_filtradas,
+            index=posicion_opcion(fuentes_filtradas, fuente_actual),
+            # Todas las opciones son del tipo seleccionado
+            format_func=lambda x: tipo_seleccionado['nombre'] if x else "Sin fuente",
+            key=f'fuente_{codigo_canal}'
+        )
+
+        volumen_inicial = int(canal['volumen']) if isinstance(canal['volumen'], (int, float)) else 0
+        volumen = st.slider(
+            'Volumen:',
+            0, 100,
+            volumen_inicial,
+            1,
+            key=f'volumen_{codigo_canal}'
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            solo = st.checkbox('Solo', canal['solo'], key=f'solo_{codigo_canal}')
+        with col2:
+            mute = st.checkbox('Mute', canal['mute'], key=f'mute_{codigo_canal}')
+        with col3:
+            link = st.checkbox('Link', canal['link'], key=f'link_{codigo_canal}')
+
+    return {
+        'fuente_id': fuente_seleccionada,
+        'volumen': volumen,
+        'solo': solo,
+        'mute': mute,
+        'link': link
+    }
 
 def main():
     # Inyectar CSS personalizado
-    st.markdown(custom_css(), unsafe_allow_html=True)
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
     st.title('Consola de Audio')
 
-    # Selección de usuario
+    # Una sola conexión para todo el renderizado; los helpers la reutilizan
     with database_connection():
-        usuarios = list(obtener_usuarios())  # Convertir a lista para materializar la consulta
-
-    usuario_seleccionado = st.selectbox(
-        'Selecciona un usuario:',
-        options=usuarios,
-        format_func=lambda x: x.email
-    )
+        # Selección de usuario
+        usuarios = obtener_usuarios()
+
+        usuario_seleccionado = st.selectbox(
+            'Selecciona un usuario:',
+            options=usuarios,
+            format_func=lambda x: x['email']
+        )
+
+        if usuario_seleccionado:
+            # Obtener la última configuración del usuario
+            configuracion = obtener_configuracion_usuario(usuario_seleccionado['id_usuario'])
+
+            if configuracion:
+                interfaz = obtener_interfaz_configuracion(configuracion)
+
+                # Obtener entradas y canales con sus relaciones ya resueltas.
+                # Las conexiones se guardan en la sesión mientras no cambie la
+                # configuración, para que los reruns no vuelvan a consultarlas.
+                clave = (
+                    usuario_seleccionado['id_usuario'],
+                    configuracion.id_configuracion,
+                    configuracion.fecha
+                )
+                if st.session_state.get('clave_configuracion') != clave:
+                    st.session_state.conexiones = obtener_conexiones_entradas(configuracion)
+                    st.session_state.clave_configuracion = clave
+                conexiones = st.session_state.conexiones
+                canales = obtener_canales_configuracion(configuracion)
 
-    if usuario_seleccionado:
-        # Obtener la última configuración del usuario
-        with database_connection():
-            configuracion = obtener_configuracion_usuario(usuario_seleccionado)
-        
-        if configuracion:
-            with database_connection():
-                interfaz = configuracion.get_interfaz()
-                
-               # Obtener entradas y canales y materializarlos en listas
-                entradas = list(configuracion.get_entradas())
-                canales = list(configuracion.get_canales())
-            
-            # Mostrar la interfaz de audio
-            if interfaz:
-                st.markdown(f"""
-                <div class="custom-card">
-                    <div class="card-header">
-                        <h3>Interfaz de Audio: {interfaz.nombre_comercial}</h3>
-                    </div>
-                    <div class="card-body">
-                        <p><b>Modelo:</b> {interfaz.modelo}</p>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            # Cargar frecuencias
-            with database_connection():
-                frecuencias = list(Frecuencia.select())
-                interfaz = configuracion.get_interfaz()
-                # Obtener la frecuencia actual de la interfaz
-                frecuencia_actual = None
+                # Mostrar la interfaz de audio
                 if interfaz:
-                    try:
-                        frecuencia_actual = (InterfazFrecuencia
-                                            .select(InterfazFrecuencia.frecuencia)
-                                            .where(InterfazFrecuencia.interfaz == interfaz.id_interfaz)
-                                            .get()
-                                            .frecuencia)
-                    except InterfazFrecuencia.DoesNotExist:
-                        pass
-
-            nueva_frecuencia = st.selectbox(
-                'Frecuencia (kHz):',
-                options=frecuencias,
-                index=frecuencias.index(frecuencia_actual) if frecuencia_actual in frecuencias else 0,
-                format_func=lambda x: f"{x.valor} kHz"
-            )
-
-            # Dividir en columnas
-            col1, col2 = st.columns(2)
-
-            # Almacenar los cambios realizados
-            cambios_entradas = {}
-            cambios_canales = {}
-
-            # Columna de Entradas
-            with col1:
-                st.subheader('Entradas')
-                for entrada in entradas:
-                    st.markdown(f"""
-                    <div class="custom-card">
-                        <div class="card-header">
-                            <h3>Entrada {entrada.id_entrada}</h3>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    dispositivos = list(Dispositivo.select())
-                    dispositivo_actual = entrada.get_dispositivo_configuracion(configuracion.id)
-                    dispositivo_seleccionado = st.selectbox(
-                        'Dispositivo:',
-                        options=dispositivos,
-                        index=dispositivos.index(dispositivo_actual) if dispositivo_actual in dispositivos else 0,
-                        format_func=lambda x: x.nombre,
-                        key=f'dispositivo_{entrada.id_entrada}'
+                    st.markdown(
+                        TARJETA_INTERFAZ.format(
+                            nombre_comercial=interfaz['nombre_comercial'],
+                            modelo=interfaz['modelo']
+                        ),
+                        unsafe_allow_html=True
                     )
 
-                    # Guardar cambio
-                    cambios_entradas[entrada.id_entrada] = dispositivo_seleccionado.id_dispositivo
-
-            # Columna de Canales
-            with col2:
-                st.subheader('Canales')
-                for canal in canales:
-                    with database_connection():
-                        parametros = obtener_parametros_canal(canal, configuracion)
-                        # fuentes = list(Fuente.select())
-                        # fuente_actual = canal.get_fuente()
-                        # tipos = list(Tipo.select())
-                    
-                    st.markdown(f"""
-                    <div class="custom-card">
-                        <div class="card-header">
-                            <h3>Canal {canal.codigo_canal}</h3>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    with database_connection():
-                        fuentes = list(Fuente.select())
-                        fuente_actual = canal.get_fuente()
-
-                        # Obtener tipo actual si existe
-                        tipo_actual = None
-                        if fuente_actual:
-                            tipo_actual = fuente_actual.get_tipo()
-
-                        tipos = list(Tipo.select())
-
-                    # Selector de tipo
-                    tipo_seleccionado = st.selectbox(
-                        'Tipo:',
-                        options=tipos,
-                        index=tipos.index(tipo_actual) if tipo_actual in tipos else 0,
-                        format_func=lambda x: f"{x.id_tipo}" if x else "Sin tipo",  # Modificado para mostrar el ID
-                        key=f'tipo_{canal.codigo_canal}'
+                # Cargar frecuencias
+                frecuencias = obtener_frecuencias()
+                indice_frecuencias = {f['id_frecuencia']: i for i, f in enumerate(frecuencias)}
+                # Frecuencia actual de la interfaz
+                id_frecuencia_actual = interfaz['id_frecuencia'] if interfaz else None
+
+                # Agrupar los controles en un formulario para que los cambios se
+                # apliquen en un solo rerun en lugar de uno por widget
+                with st.form('consola_form'):
+                    nueva_frecuencia = st.selectbox(
+                        'Frecuencia (kHz):',
+                        options=frecuencias,
+                        index=indice_frecuencias.get(id_frecuencia_actual, 0),
+                        format_func=lambda x: f"{x['valor']} kHz"
                     )
 
-                    # Filtrar fuentes por tipo seleccionado
-                    with database_connection():
-                        fuentes_filtradas = [
-                            f for f in fuentes 
-                            if f.get_tipo() and tipo_seleccionado and f.get_tipo().id_tipo == tipo_seleccionado.id_tipo
-                        ]
-
-                    # Si no hay fuentes filtradas, mostrar opción vacía
-                    if not fuentes_filtradas:
-                        fuentes_filtradas = [None]
-                        fuente_actual = None
-
-                    fuente_seleccionada = st.selectbox(
-                        'Fuente:',
-                        options=fuentes_filtradas,
-                        index=fuentes_filtradas.index(fuente_actual) if fuente_actual in fuentes_filtradas else 0,
-                        format_func=lambda x: get_nombre_fuente(x) if x else "Sin fuente",
-                        key=f'fuente_{canal.codigo_canal}'
-                    )
+                    # Dividir en columnas
+                    col1, col2 = st.columns(2)
 
-                    volumen_inicial = int(parametros['Volumen']) if isinstance(parametros['Volumen'], (int, float)) else 0
-                    volumen = st.slider(
-                        'Volumen:',
-                        0, 100,
-                        int(parametros['Volumen']),
-                        1,
-                        key=f'volumen_{canal.codigo_canal}'
-                    )
+                    # Almacenar los cambios realizados
+                    cambios_entradas = {}
+                    cambios_canales = {}
 
-                    col1, col2, col3 = st.columns(3)
+                    # Columna de Entradas
                     with col1:
-                        solo = st.checkbox('Solo', parametros['Solo'], key=f'solo_{canal.codigo_canal}')
+                        st.subheader('Entradas')
+                        dispositivos = obtener_dispositivos()
+                        # Posición de cada opción por ID para evitar list.index() en cada widget
+                        indice_dispositivos = {d['id_dispositivo']: i for i, d in enumerate(dispositivos)}
+                        for conexion in conexiones:
+                            cambios_entradas[conexion['id_entrada']] = render_entrada(
+                                conexion['id_entrada'],
+                                conexion['id_dispositivo'],
+                                dispositivos,
+                                indice_dispositivos
+                            )
+
+                    # Columna de Canales
                     with col2:
-                        mute = st.checkbox('Mute', parametros['Mute'], key=f'mute_{canal.codigo_canal}')
-                    with col3:
-                        link = st.checkbox('Link', parametros['Link'], key=f'link_{canal.codigo_canal}')
-
-                    # Guardar cambios del canal
-                    cambios_canales[canal.codigo_canal] = {
-                        'fuente_id': fuente_seleccionada.id_fuente if fuente_seleccionada else None,
-                        'volumen': volumen,
-                        'solo': solo,
-                        'mute': mute,
-                        'link': link
-                    }
-
-            # Botón para guardar cambios
-            if st.button('Guardar Cambios'):
-                if guardar_cambios(configuracion, nueva_frecuencia, cambios_entradas, cambios_canales):
-                    st.success('Cambios guardados exitosamente')
-                    # Esperar un momento para que el usuario vea el mensaje
-                    time.sleep(1)
-                    # Actualizar el estado de la página sin recargarla
-                    st.session_state.update_needed = True
-                else:
-                    st.error('Error al guardar los cambios')
-
+                        st.subheader('Canales')
+                        tipos = obtener_tipos()
+                        indice_tipos = {t['id_tipo']: i for i, t in enumerate(tipos)}
+                        fuentes_por_tipo = obtener_fuentes_por_tipo()
+                        for canal in canales:
+                            cambios_canales[canal['codigo_canal']] = render_canal(
+                                canal,
+                                tipos,
+                                indice_tipos,
+                                fuentes_por_tipo
+                            )
+
+                    # Ambos botones envían el formulario; solo 'Guardar Cambios'
+                    # escribe en la base de datos los valores enviados
+                    st.form_submit_button('Aplicar')
+                    guardar = st.form_submit_button('Guardar Cambios')
+
+                if guardar:
+                    if guardar_cambios(configuracion, nueva_frecuencia['id_frecuencia'], cambios_entradas, cambios_canales):
+                        st.success('Cambios guardados exitosamente')
+                        # Esperar un momento para que el usuario vea el mensaje
+                        time.sleep(1)
+                        # Actualizar el estado de la página sin recargarla
+                        st.session_state.update_needed = True
+                    else:
+                        st.error('Error al guardar los cambios')
+
+            else:
+                st.info('Este usuario no tiene configuraciones.')
         else:
-            st.info('Este usuario no tiene configuraciones.')
-    else:
-        st.info('Por favor, selecciona un usuario para ver y editar su configuración.')
+            st.info('Por favor, selecciona un usuario para ver y editar su configuración.')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,12 @@
 #Librerías
+import logging
 import sqlite3
 from sqlite3 import Error
 
+from model.base import PRAGMAS
+
+logger = logging.getLogger(__name__)
+
 #Especificación de la ruta donde se encuentra la base de datos
 especificacionRuta = 'db/Base_De_Datos.db'
 
@@ -10,6 +15,10 @@ def crearConexion(rutaBD=especificacionRuta):
     try:
         conn = sqlite3.connect(rutaBD)
 
+        #Aplicar los mismos pragmas que usa el ORM
+        for nombre, valor in PRAGMAS.items():
+            conn.execute(f"PRAGMA {nombre} = {valor}")
+
         #Retornar instancia de la conexión    
         return conn
         
@@ -20,5 +29,4 @@ def crearConexion(rutaBD=especificacionRuta):
         # print("-------------------------")       
         
     except Error as e:
-        print("*Especificación del error generado al conectarse a la base de datos:")
-        print(e)
\ No newline at end of file
+        logger.error(f"Error al conectarse a la base de datos: {e}")
\ No newline at end of file
@@ -1,20 +1,39 @@
 from contextlib import contextmanager
+from functools import wraps
 import logging
+import re
+import time
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator
 
-from peewee import Model, SqliteDatabase, DatabaseProxy, DeferredForeignKey
+from peewee import Model, SqliteDatabase, DatabaseProxy, Expression, Field, OperationalError, SQL
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 database_proxy = DatabaseProxy()
 _database = None
 
+# Filas por INSERT en las inserciones masivas (SQLite limita las variables por sentencia)
+TAMANO_LOTE_INSERCION = 100
+
+# Pragmas compartidos por todas las conexiones a la base de datos
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'foreign_keys': 1,
+    'cache_size': -1024 * 64,
+    # Con WAL basta sincronizar en los checkpoints
+    'synchronous': 'normal',
+    'temp_store': 'memory',
+    'mmap_size': 256 * 1024 * 1024,
+    # Esperar hasta 5 s por el bloqueo de escritura en lugar de fallar con SQLITE_BUSY
+    'busy_timeout': 5000
+}
+
+# Reintentos de una transacción cuando la base de datos sigue bloqueada
+# después de busy_timeout, y espera antes del primero (se duplica en cada uno)
+REINTENTOS_BLOQUEO = 3
+ESPERA_REINTENTO = 0.1
+
 def get_database() -> SqliteDatabase:
     """
     Obtiene la instancia de la base de datos, inicializándola si es necesario.
@@ -29,19 +48,25 @@ def initialize_database(db_path: str = 'db/Base_De_Datos.db') -> SqliteDatabase:
     """
     Inicializa la conexión a la base de datos SQLite.
     """
+    # El pool solo hace falta al abrir la base de datos; los scripts que
+    # importan los modelos sin conectarse no cargan playhouse
+    from playhouse.pool import PooledSqliteDatabase
+
     try:
         # Asegurar que el directorio de la base de datos existe
         db_directory = Path(db_path).parent
         db_directory.mkdir(parents=True, exist_ok=True)
         
-        # Configurar la base de datos con pragmas recomendados para SQLite
-        database = SqliteDatabase(
+        # Configurar la base de datos con pragmas recomendados para SQLite.
+        # El pool reutiliza las conexiones abiertas entre reruns de Streamlit
+        # en lugar de abrir el archivo y aplicar los pragmas cada vez. Cada
+        # rerun corre en otro hilo, así que una conexión devuelta al pool
+        # debe poder usarse desde un hilo distinto al que la abrió.
+        database = PooledSqliteDatabase(
             db_path,
-            pragmas={
-                'journal_mode': 'wal',
-                'foreign_keys': 1,
-                'cache_size': -1024 * 64
-            }
+            pragmas=PRAGMAS,
+            stale_timeout=300,
+            check_same_thread=False
         )
         
         # Inicializar el proxy con la instancia real de la base de datos
@@ -76,6 +101,73 @@ def database_connection() -> Generator[SqliteDatabase, None, None]:
         if was_closed and not database.is_closed():
             database.close()
 
+def reintentar_si_bloqueada(funcion: Callable) -> Callable:
+    """
+    Decorador que vuelve a ejecutar una transacción cuando falla porque otra
+    conexión mantiene bloqueada la base de datos, esperando cada vez el doble.
+    
+    La función decorada debe abrir y cerrar su propia transacción, de modo
+    que un intento fallido no deje escrituras a medias.
+    
+    Args:
+        funcion (Callable): Función que ejecuta la transacción
+        
+    Returns:
+        Callable: Función que reintenta hasta REINTENTOS_BLOQUEO veces
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        for intento in range(REINTENTOS_BLOQUEO + 1):
+            try:
+                return funcion(*args, **kwargs)
+            except OperationalError as e:
+                if 'locked' not in str(e) or intento == REINTENTOS_BLOQUEO:
+                    raise
+                espera = ESPERA_REINTENTO * 2 ** intento
+                logger.warning(f"Base de datos bloqueada, reintentando en {espera} s")
+                time.sleep(espera)
+    return envoltura
+
+def coincide_prefijo(campo: Field, prefijo: str) -> Expression:
+    """
+    Construye la condición `campo GLOB 'prefijo*'`.
+    
+    A diferencia de LIKE, GLOB distingue mayúsculas y minúsculas, por lo que
+    SQLite puede resolver la búsqueda por prefijo con un índice sobre el campo
+    en lugar de recorrer la tabla.
+    
+    Args:
+        campo (Field): Campo sobre el que buscar
+        prefijo (str): Texto con el que debe empezar el valor
+        
+    Returns:
+        Expression: Condición para usar en un where()
+    """
+    # Escapar los comodines de GLOB para buscar el texto literal
+    patron = re.sub(r'([*?\[])', r'[\1]', prefijo) + '*'
+    return Expression(campo, 'GLOB', patron)
+
+def coincide_texto(clave: Field, columna: str, texto: str) -> Expression:
+    """
+    Construye una condición de búsqueda de subcadena sobre el índice FTS5
+    <tabla>_FTS de la tabla del campo (ver model.database_schema).
+    
+    Args:
+        clave (Field): Clave primaria del modelo, que es el rowid del índice
+        columna (str): Columna indexada en la que buscar
+        texto (str): Texto a buscar, de al menos tres caracteres
+        
+    Returns:
+        Expression: Condición para usar en un where()
+    """
+    tabla_fts = f'{clave.model._meta.table_name}_FTS'
+    # Frase entre comillas para que FTS5 no interprete operadores
+    frase = '"' + texto.replace('"', '""') + '"'
+    return clave.in_(SQL(
+        f'(SELECT rowid FROM "{tabla_fts}" WHERE "{columna}" MATCH ?)',
+        (frase,)
+    ))
+
 class BaseModel(Model):
     class Meta:
         database = database_proxy
\ No newline at end of file
@@ -1,18 +1,28 @@
+from functools import cached_property
 from typing import Optional, List
-from datetime import datetime
+import logging
 
 from peewee import (
     CharField,
-    ForeignKeyField,
-    DeferredForeignKey,
-    FloatField,
     IntegerField,
-    BooleanField,
-    DatabaseError
+    DatabaseError,
+    chunked
 )
 
-from model.base import BaseModel, database_connection
-# from model.configuracion import Configuracion, Establece
+from model.base import BaseModel, database_connection, coincide_prefijo, coincide_texto, TAMANO_LOTE_INSERCION
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de canales que devuelve una búsqueda por etiqueta
+LIMITE_BUSQUEDA = 100
+
+# Parámetros de un canal que no tiene fila en Establece para una configuración
+PARAMETROS_POR_DEFECTO = {
+    'volumen': 0.0,
+    'solo': False,
+    'mute': False,
+    'link': False
+}
 
 class Canal(BaseModel):
     """
@@ -77,6 +87,32 @@ class Canal(BaseModel):
             )
         except DatabaseError as e:
             raise DatabaseError(f"Error al crear el canal: {str(e)}")
+
+    @classmethod
+    def crear_canales(cls, etiquetas: List[str]) -> int:
+        """
+        Crea varios canales en una sola transacción, insertando por lotes.
+        
+        Args:
+            etiquetas (List[str]): Etiquetas identificativas de los canales
+            
+        Returns:
+            int: Número de canales creados
+            
+        Raises:
+            ValueError: Si alguna etiqueta está vacía
+            DatabaseError: Si hay un error en la creación de los canales
+        """
+        if not all(etiquetas):
+            raise ValueError("La etiqueta del canal no puede estar vacía")
+        
+        try:
+            with cls._meta.database.atomic('IMMEDIATE'):
+                for lote in chunked(etiquetas, TAMANO_LOTE_INSERCION):
+                    cls.insert_many([(etiqueta,) for etiqueta in lote], fields=[cls.etiqueta]).execute()
+            return len(etiquetas)
+        except DatabaseError as e:
+            raise DatabaseError(f"Error al crear los canales: {str(e)}")
         
     def get_fuente(self):
         """
@@ -98,8 +134,8 @@ class Canal(BaseModel):
                             .where(Establece.canal == self.codigo_canal)
                             .first())
                 return establece.fuente if establece else None
-            except Exception as e:
-                print(f"Error al obtener fuente del canal: {e}")
+            except DatabaseError as e:
+                logger.error(f"Error al obtener fuente del canal: {e}")
                 return None
 
 
@@ -114,28 +150,65 @@ class Canal(BaseModel):
             dict: Diccionario con los parámetros del canal
         """
         from model.configuracion import Establece
-        try:
-            establece = (Establece
-                        .select()
-                        .where(
-                            (Establece.canal == self) & 
-                            (Establece.configuracion == configuracion_id)
-                        )
-                        .get())
+        parametros = (Establece
+                      .select(
+                          Establece.volumen,
+                          Establece.solo,
+                          Establece.mute,
+                          Establece.link
+                      )
+                      .where(
+                          (Establece.canal == self.codigo_canal) &
+                          (Establece.configuracion == configuracion_id)
+                      )
+                      .dicts()
+                      .first())
+
+        if parametros is None:
+            return dict(PARAMETROS_POR_DEFECTO)
+        return parametros
+
+    @classmethod
+    def get_parametros_canales(cls, configuracion_id: int, codigos_canal: List[int]) -> dict:
+        """
+        Obtiene los parámetros de varios canales para una configuración con
+        una sola consulta, en lugar de llamar a get_parametros_configuracion
+        por cada canal.
+        
+        Args:
+            configuracion_id (int): ID de la configuración
+            codigos_canal (List[int]): Códigos de los canales
             
-            return {
-                'volumen': establece.volumen,
-                'solo': establece.solo,
-                'mute': establece.mute,
-                'link': establece.link
-            }
-        except Establece.DoesNotExist:
-            return {
-                'volumen': 0.0,
-                'solo': False,
-                'mute': False,
-                'link': False
+        Returns:
+            dict: Código de canal -> diccionario con los parámetros; los
+                canales sin parámetros guardados reciben PARAMETROS_POR_DEFECTO
+        """
+        from model.configuracion import Establece
+        parametros = {
+            codigo_canal: dict(PARAMETROS_POR_DEFECTO)
+            for codigo_canal in codigos_canal
+        }
+        filas = (Establece
+                 .select(
+                     Establece.canal,
+                     Establece.volumen,
+                     Establece.solo,
+                     Establece.mute,
+                     Establece.link
+                 )
+                 .where(
+                     (Establece.configuracion == configuracion_id) &
+                     (Establece.canal.in_(list(codigos_canal)))
+                 )
+                 .tuples())
+        for codigo_canal, volumen, solo, mute, link in filas:
+            parametros[codigo_canal] = {
+                'volumen': volumen,
+                'solo': solo,
+                'mute': mute,
+                'link': link
             }
+        return parametros
 
     def set_parametros_configuracion(
         self,
@@ -166,27 +239,38 @@ class Canal(BaseModel):
 
         try:
             from model.configuracion import Establece
-            establece, created = Establece.get_or_create(
-                canal=self,
-                configuracion=configuracion_id,
-                defaults={
-                    'volumen': 0.0,
-                    'solo': False,
-                    'mute': False,
-                    'link': False
-                }
-            )
-            
-            if volumen is not None:
-                establece.volumen = volumen
-            if solo is not None:
-                establece.solo = solo
-            if mute is not None:
-                establece.mute = mute
-            if link is not None:
-                establece.link = link
-                
-            establece.save()
+            cambios = {
+                campo: valor
+                for campo, valor in (
+                    (Establece.volumen, volumen),
+                    (Establece.solo, solo),
+                    (Establece.mute, mute),
+                    (Establece.link, link)
+                )
+                if valor is not None
+            }
+            condicion = ((Establece.canal == self.codigo_canal) &
+                         (Establece.configuracion == configuracion_id))
+
+            # La tabla no tiene restricción UNIQUE sobre (configuración, canal)
+            # para usar ON CONFLICT; se intenta el UPDATE y solo si no había
+            # fila se inserta, de modo que el caso habitual es una sentencia
+            with self._meta.database.atomic('IMMEDIATE'):
+                if cambios:
+                    if Establece.update(cambios).where(condicion).execute():
+                        return True
+                elif Establece.select().where(condicion).exists():
+                    return True
+
+                Establece.insert({
+                    Establece.canal: self.codigo_canal,
+                    Establece.configuracion: configuracion_id,
+                    Establece.volumen: 0.0,
+                    Establece.solo: False,
+                    Establece.mute: False,
+                    Establece.link: False,
+                    **cambios
+                }).execute()
             return True
             
         except DatabaseError as e:
@@ -207,32 +291,123 @@ class Canal(BaseModel):
                 .join(Personaliza)
                 .where(Personaliza.interfaz == self))
 
-    def get_tipo_fuente(self) -> Optional[str]:
+    def get_fuente_id(self, configuracion_id: int) -> Optional[int]:
         """
-        Obtiene el tipo de fuente asociada al canal.
+        Obtiene el ID de la fuente asignada al canal en una configuración.
         
+        La fuente se guarda por configuración en Establece; se lee solo esa
+        columna, sin cargar la Fuente.
+        
+        Args:
+            configuracion_id (int): ID de la configuración
+            
+        Returns:
+            Optional[int]: ID de la fuente o None si no tiene
+        """
+        from model.configuracion import Establece
+        return (Establece
+                .select(Establece.fuente)
+                .where(
+                    (Establece.canal == self.codigo_canal) &
+                    (Establece.configuracion == configuracion_id)
+                )
+                .order_by(Establece.id_establece)
+                .scalar())
+
+    @cached_property
+    def _nombres_tipo_fuente(self) -> dict:
+        """
+        Nombres de tipo ya consultados por esta instancia, por ID de fuente.
+        """
+        return {}
+
+    def _nombre_tipo_fuente(self, fuente_id: Optional[int]) -> Optional[str]:
+        """
+        Nombre del tipo de una fuente, o None si no hay fuente.
+        
+        Se obtiene con una sola consulta (Clasifica -> Tipo) la primera vez
+        que se pide cada fuente y queda guardado en la instancia.
+        """
+        if fuente_id is None:
+            return None
+
+        if fuente_id not in self._nombres_tipo_fuente:
+            from model.fuente import Clasifica
+            from model.tipo import Tipo
+            self._nombres_tipo_fuente[fuente_id] = (
+                Tipo
+                .select(Tipo.nombre)
+                .join(Clasifica, on=(Clasifica.tipo == Tipo.id_tipo))
+                .where(Clasifica.fuente == fuente_id)
+                .scalar()
+            )
+        return self._nombres_tipo_fuente[fuente_id]
+
+    def get_tipo_fuente(self, configuracion_id: int) -> Optional[str]:
+        """
+        Obtiene el tipo de la fuente asignada al canal en una configuración.
+        
+        Args:
+            configuracion_id (int): ID de la configuración
+            
         Returns:
             Optional[str]: Nombre del tipo de fuente o None si no tiene
         """
-        if self.fuente:
-            tipo = self.fuente.get_tipo()
-            return tipo.nombre if tipo else None
-        return None
+        return self._nombre_tipo_fuente(self.get_fuente_id(configuracion_id))
 
-    def to_dict(self) -> dict:
+    def to_dict(self, configuracion_id: int) -> dict:
         """
-        Convierte el canal a un diccionario para serialización.
+        Convierte el canal a un diccionario para serialización, con la fuente
+        que tiene asignada en una configuración.
         
+        Args:
+            configuracion_id (int): ID de la configuración
+            
         Returns:
             dict: Representación en diccionario del canal
         """
+        fuente_id = self.get_fuente_id(configuracion_id)
         return {
             'codigo_canal': self.codigo_canal,
             'etiqueta': self.etiqueta,
-            'fuente_id': self.fuente.id if self.fuente else None,
-            'tipo_fuente': self.get_tipo_fuente()
+            'fuente_id': fuente_id,
+            'tipo_fuente': self._nombre_tipo_fuente(fuente_id)
         }
 
+    @classmethod
+    def to_dicts(cls, configuracion_id: int) -> List[dict]:
+        """
+        Serializa los canales de una configuración con las mismas claves que
+        to_dict, leyendo la fuente y el nombre de su tipo en la misma consulta
+        en lugar de hacer consultas por canal.
+        
+        Args:
+            configuracion_id (int): ID de la configuración
+            
+        Returns:
+            List[dict]: Representación en diccionario de cada canal
+        """
+        from model.configuracion import Establece
+        from model.fuente import Clasifica
+        from model.tipo import Tipo
+        # Subconsulta correlacionada: una fuente puede tener varias filas en
+        # Clasifica y se toma solo la primera, igual que get_tipo_fuente
+        tipo_fuente = (Tipo
+                       .select(Tipo.nombre)
+                       .join(Clasifica, on=(Clasifica.tipo == Tipo.id_tipo))
+                       .where(Clasifica.fuente == Establece.fuente)
+                       .limit(1))
+        return list(cls
+                    .select(
+                        cls.codigo_canal,
+                        cls.etiqueta,
+                        Establece.fuente.alias('fuente_id'),
+                        tipo_fuente.alias('tipo_fuente')
+                    )
+                    .join(Establece, on=(Establece.canal == cls.codigo_canal))
+                    .where(Establece.configuracion == configuracion_id)
+                    .dicts())
+
     def __str__(self) -> str:
         """
         Representación en string del canal.
@@ -250,24 +425,48 @@ class Canal(BaseModel):
         Returns:
             List[Canal]: Lista de canales que usan ese tipo de fuente
         """
-        from model.fuente import Fuente
-        from model.tipo import Tipo
-        
-        return (cls
-                .select()
-                .join(Fuente)
-                .join(Tipo)
-                .where(Tipo.id == tipo_id))
+        from model.configuracion import Establece
+        from model.fuente import Clasifica
+
+        # El canal no referencia a la fuente; la relación pasa por Establece
+        return list(cls
+                    .select()
+                    .join(Establece, on=(Establece.canal == cls.codigo_canal))
+                    .join(Clasifica, on=(Clasifica.fuente == Establece.fuente))
+                    .where(Clasifica.tipo == tipo_id)
+                    .distinct()
+                    .iterator())
 
     @classmethod
-    def buscar_por_etiqueta(cls, etiqueta: str) -> List['Canal']:
+    def buscar_por_etiqueta(
+        cls,
+        etiqueta: str,
+        prefijo: bool = False,
+        limite: int = LIMITE_BUSQUEDA
+    ) -> List['Canal']:
         """
         Busca canales por coincidencia parcial de etiqueta.
         
+        Las búsquedas de tres o más caracteres usan el índice de texto
+        completo Canal_FTS (ver model.database_schema); las más cortas no
+        pueden formar un trigrama y recurren a LIKE.
+        
         Args:
             etiqueta (str): Texto a buscar en las etiquetas
+            prefijo (bool): Si es True, busca solo las etiquetas que empiezan por
+                el texto, distinguiendo mayúsculas, usando el índice
+            limite (int): Número máximo de canales a devolver
             
         Returns:
             List[Canal]: Lista de canales que coinciden con la búsqueda
         """
-        return cls.select().where(cls.etiqueta.contains(etiqueta))
\ No newline at end of file
+        # Sin texto no hay nada que filtrar; se evita el LIKE '%%' sobre cada fila
+        if not etiqueta:
+            query = cls.select()
+        elif prefijo:
+            query = cls.select().where(coincide_prefijo(cls.etiqueta, etiqueta))
+        elif len(etiqueta) < 3:
+            query = cls.select().where(cls.etiqueta.contains(etiqueta))
+        else:
+            query = cls.select().where(coincide_texto(cls.codigo_canal, 'Etiqueta', etiqueta))
+        return query.limit(limite)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from datetime import datetime
-from typing import List, TYPE_CHECKING, Optional
+from functools import cached_property, reduce
+import logging
+import operator
+from typing import List, TYPE_CHECKING
 
 from peewee import (
     DateTimeField, 
@@ -8,13 +11,15 @@ from peewee import (
     FloatField, 
     IntegerField,
     BooleanField,
-    Model
+    DatabaseError,
+    Case,
+    JOIN,
+    chunked
 )
 
-from model.base import BaseModel, database_connection
-# from model.canal import Canal
-# from model.entrada import Entrada
-# from model.usuario import Usuario
+from model.base import BaseModel, database_connection, reintentar_si_bloqueada, TAMANO_LOTE_INSERCION
+
+logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
     from model.entrada import Entrada
@@ -54,6 +59,28 @@ class Configuracion(BaseModel):
             (('fecha',), False),  # Índice en fecha para búsquedas
         )
 
+    @cached_property
+    def _personaliza(self):
+        """
+        Fila de Personaliza de esta configuración, con su usuario e interfaz
+        leídos en la misma consulta (atributos `usuario` e `interfaz_audio`).
+        Se consulta una sola vez por instancia; None si no hay ninguna.
+        """
+        from model.interfaz_audio import InterfazAudio
+        from model.usuario import Usuario, Personaliza
+        return (Personaliza
+                .select(Personaliza, Usuario, InterfazAudio)
+                .join(Usuario, on=(Personaliza.usuario == Usuario.id_usuario), attr='usuario')
+                .switch(Personaliza)
+                .join(
+                    InterfazAudio,
+                    JOIN.LEFT_OUTER,
+                    on=(Personaliza.interfaz == InterfazAudio.id_interfaz),
+                    attr='interfaz_audio'
+                )
+                .where(Personaliza.configuracion == self.id_configuracion)
+                .first())
+
     def get_usuario(self):
         """
         Obtiene el usuario asociado a esta configuración.
@@ -61,12 +88,7 @@ class Configuracion(BaseModel):
         Returns:
             Usuario: Usuario propietario de la configuración
         """
-        from model.usuario import Personaliza
-        personaliza = (Personaliza
-                      .select()
-                      .where(Personaliza.configuracion == self)
-                      .first())
-        return personaliza.usuario if personaliza else None
+        return self._personaliza.usuario if self._personaliza else None
 
     def get_interfaz(self):
         """
@@ -75,23 +97,16 @@ class Configuracion(BaseModel):
         Returns:
             InterfazAudio: Interfaz de audio asociada
         """
-        from model.interfaz_audio import InterfazAudio
-        from model.usuario import Personaliza
-        
-        try:
-            return (InterfazAudio
-                   .select()
-                   .join(Personaliza, on=(Personaliza.interfaz == InterfazAudio.id_interfaz))
-                   .where(Personaliza.configuracion == self.id_configuracion)
-                   .get())
-        except Exception as e:
-            print(f"Error al obtener interfaz: {e}")
-            return None
+        return self._personaliza.interfaz_audio if self._personaliza else None
 
     def get_canales(self) -> List['Canal']:
         """
         Obtiene todos los canales asociados a esta configuración.
         
+        Los parámetros de cada canal se leen en la misma consulta y quedan en
+        el atributo `parametros` (Establece), para no consultar una vez por
+        canal al recorrer la lista.
+        
         Returns:
             List[Canal]: Lista de canales con sus parámetros
         """
@@ -99,30 +114,69 @@ class Configuracion(BaseModel):
         try:
             with database_connection():
                 return list(Canal
-                    .select()
-                    .join(Establece, on=(Establece.canal == Canal.codigo_canal))
+                    .select(Canal, Establece)
+                    .join(
+                        Establece,
+                        on=(Establece.canal == Canal.codigo_canal),
+                        attr='parametros'
+                    )
                     .where(Establece.configuracion == self.id_configuracion))
-        except Exception as e:
-            print(f"Error al obtener canales: {e}")
+        except DatabaseError as e:
+            logger.error(f"Error al obtener canales: {e}")
             return []
 
     def get_entradas(self) -> List['Entrada']:
         """
         Obtiene todas las entradas asociadas a esta configuración.
         
+        La conexión de cada entrada se lee en la misma consulta y queda en el
+        atributo `conexion` (Conectado), con el ID del dispositivo conectado.
+        
         Returns:
             List[Entrada]: Lista de entradas conectadas
         """
         from model.entrada import Entrada
         try:
-            return (Entrada
-                   .select()
-                   .join(Conectado, on=(Conectado.entrada == Entrada.id_entrada))
-                   .where(Conectado.configuracion == self.id_configuracion))
-        except Exception as e:
-            print(f"Error al obtener entradas: {e}")
+            with database_connection():
+                return list(Entrada
+                    .select(Entrada, Conectado)
+                    .join(
+                        Conectado,
+                        on=(Conectado.entrada == Entrada.id_entrada),
+                        attr='conexion'
+                    )
+                    .where(Conectado.configuracion == self.id_configuracion))
+        except DatabaseError as e:
+            logger.error(f"Error al obtener entradas: {e}")
             return []
 
+    def set_dispositivos_entradas(self, dispositivos_por_entrada: dict) -> None:
+        """
+        Reemplaza los dispositivos conectados a varias entradas de esta
+        configuración con un solo DELETE y un solo INSERT múltiple, en lugar
+        de una consulta por entrada.
+        
+        Args:
+            dispositivos_por_entrada (dict): ID de entrada -> ID del dispositivo
+                a conectar, o None para dejar la entrada sin dispositivo
+        """
+        Conectado.delete().where(
+            (Conectado.configuracion == self.id_configuracion) &
+            (Conectado.entrada.in_(list(dispositivos_por_entrada)))
+        ).execute()
+
+        conexiones = [
+            {
+                'configuracion': self.id_configuracion,
+                'entrada': entrada_id,
+                'dispositivo': dispositivo_id
+            }
+            for entrada_id, dispositivo_id in dispositivos_por_entrada.items()
+            if dispositivo_id
+        ]
+        if conexiones:
+            Conectado.insert_many(conexiones).execute()
+
     def actualizar_parametros_canal(self, canal: 'Canal', 
                                   volumen: float = None, 
                                   solo: bool = None, 
@@ -141,24 +195,121 @@ class Configuracion(BaseModel):
         Returns:
             bool: True si la actualización fue exitosa
         """
-        try:
-            establece = (Establece
-                        .get((Establece.configuracion == self) & 
-                             (Establece.canal == canal)))
-            
-            if volumen is not None:
-                establece.volumen = volumen
-            if solo is not None:
-                establece.solo = solo
-            if mute is not None:
-                establece.mute = mute
-            if link is not None:
-                establece.link = link
+        cambios = {
+            campo: valor
+            for campo, valor in (
+                (Establece.volumen, volumen),
+                (Establece.solo, solo),
+                (Establece.mute, mute),
+                (Establece.link, link)
+            )
+            if valor is not None
+        }
+        condicion = ((Establece.configuracion == self.id_configuracion) &
+                     (Establece.canal == canal.codigo_canal))
+
+        # Solo se reescribe la fila si algún valor difiere del guardado
+        if cambios:
+            distinto = reduce(operator.or_, (
+                campo.is_null() | (campo != valor)
+                for campo, valor in cambios.items()
+            ))
+            if Establece.update(cambios).where(condicion & distinto).execute():
+                return True
+
+        # Sin cambios reales basta comprobar que el canal esté configurado
+        return Establece.select().where(condicion).exists()
+
+    def actualizar_parametros_canales(self, parametros_por_canal: dict) -> int:
+        """
+        Actualiza los parámetros de varios canales de esta configuración con
+        un UPDATE por lotes (CASE por código de canal), en lugar de una
+        actualización por canal. Los canales que aún no tienen parámetros en
+        esta configuración se insertan con un solo INSERT múltiple.
+        
+        Args:
+            parametros_por_canal (dict): Código de canal -> diccionario con
+                los campos de Establece a cambiar ('volumen', 'solo', 'mute',
+                'link', 'fuente')
                 
-            establece.save()
-            return True
-        except Establece.DoesNotExist:
-            return False
+        Returns:
+            int: Número de canales actualizados o insertados
+        """
+        de_esta_configuracion = Establece.configuracion == self.id_configuracion
+
+        # Cada UPDATE escribe los mismos campos en todas sus filas, así que se
+        # agrupan los canales que cambian los mismos campos
+        por_campos = {}
+        for codigo_canal, parametros in parametros_por_canal.items():
+            por_campos.setdefault(tuple(sorted(parametros)), []).append(codigo_canal)
+
+        with self._meta.database.atomic('IMMEDIATE'):
+            for campos, canales in por_campos.items():
+                for lote in chunked(canales, TAMANO_LOTE_INSERCION):
+                    valores = {
+                        getattr(Establece, campo): Case(Establece.canal, [
+                            (codigo_canal, parametros_por_canal[codigo_canal][campo])
+                            for codigo_canal in lote
+                        ])
+                        for campo in campos
+                    }
+                    Establece.update(valores).where(
+                        de_esta_configuracion & Establece.canal.in_(lote)
+                    ).execute()
+
+            # Los canales sin fila se buscan por código y no por el número de
+            # filas actualizadas: (configuración, canal) no es UNIQUE y una
+            # fila duplicada ocultaría un canal faltante
+            existentes = {
+                codigo_canal for codigo_canal, in Establece
+                .select(Establece.canal)
+                .where(
+                    de_esta_configuracion &
+                    Establece.canal.in_(list(parametros_por_canal))
+                )
+                .tuples()
+            }
+            nuevos = [
+                {
+                    'configuracion': self.id_configuracion,
+                    'canal': codigo_canal,
+                    'fuente': None,
+                    'volumen': 0.0,
+                    'solo': False,
+                    'mute': False,
+                    'link': False,
+                    **parametros
+                }
+                for codigo_canal, parametros in parametros_por_canal.items()
+                if codigo_canal not in existentes
+            ]
+            for lote in chunked(nuevos, TAMANO_LOTE_INSERCION):
+                Establece.insert_many(lote).execute()
+
+        return len(existentes) + len(nuevos)
+
+    @reintentar_si_bloqueada
+    def eliminar(self) -> bool:
+        """
+        Elimina la configuración junto con sus canales, conexiones y
+        personalizaciones.
+        
+        Las tablas de la base de datos no declaran ON DELETE CASCADE, así que
+        cada tabla dependiente se vacía con un solo DELETE en lugar de
+        recorrer sus filas como haría delete_instance(recursive=True).
+        
+        Returns:
+            bool: True si la configuración existía y fue eliminada
+        """
+        from model.usuario import Personaliza
+        with self._meta.database.atomic('IMMEDIATE'):
+            for modelo in (Establece, Conectado, Personaliza):
+                modelo.delete().where(
+                    modelo.configuracion == self.id_configuracion
+                ).execute()
+            return bool(Configuracion.delete().where(
+                Configuracion.id_configuracion == self.id_configuracion
+            ).execute())
 
     def save(self, *args, **kwargs):
         """
@@ -0,0 +1,114 @@
+import logging
+
+from peewee import Database
+
+logger = logging.getLogger(__name__)
+
+# Índices de búsqueda sobre las columnas que la aplicación filtra o une.
+# Las tablas no las crea peewee, por lo que los índices declarados en los
+# Meta de los modelos no existen en la base de datos. Se crean sin UNIQUE
+# porque los datos existentes tienen valores repetidos (p. ej. Frecuencia).
+INDICES = (
+    ('idx_canal_etiqueta', 'Canal', ('Etiqueta',)),
+    ('idx_dispositivo_nombre', 'Dispositivo', ('Nombre',)),
+    ('idx_entrada_etiqueta', 'Entrada', ('Etiqueta',)),
+    ('idx_tipo_nombre', 'Tipo', ('Nombre',)),
+    ('idx_usuario_email', 'Usuario', ('Email',)),
+    ('idx_frecuencia_valor', 'Frecuencia', ('Valor',)),
+    # Cubre la lectura de los parámetros de los canales de una configuración
+    # sin leer la tabla
+    ('idx_establece_configuracion_canal_parametros', 'Establece',
+     ('ID_Configuracion', 'Codigo_Canal', 'Volumen', 'Solo', 'Mute', 'Link', 'ID_Fuente')),
+    ('idx_establece_canal', 'Establece', ('Codigo_Canal',)),
+    ('idx_clasifica_fuente', 'Clasifica', ('ID_Fuente',)),
+    ('idx_clasifica_tipo', 'Clasifica', ('ID_Tipo',)),
+    ('idx_conectado_configuracion_entrada', 'Conectado', ('ID_Configuracion', 'ID_Entrada')),
+    # Cubre la búsqueda de las configuraciones de un usuario sin leer la tabla
+    ('idx_personaliza_usuario_configuracion', 'Personaliza', ('ID_Usuario', 'ID_Configuracion')),
+    ('idx_personaliza_configuracion', 'Personaliza', ('ID_Configuracion',)),
+    ('idx_interfaz_frecuencia_interfaz', 'Interfaz_Frecuencia', ('ID_Interfaz',)),
+    ('idx_configuracion_fecha', 'Configuracion', ('Fecha',)),
+    # Claves foráneas recorridas en sentido inverso por los modelos
+    ('idx_interfaz_frecuencia_frecuencia', 'Interfaz_Frecuencia', ('ID_Frecuencia',)),
+    ('idx_conectado_dispositivo', 'Conectado', ('ID_Dispositivo',)),
+    ('idx_establece_fuente', 'Establece', ('ID_Fuente',)),
+    ('idx_permite_interfaz', 'Permite', ('ID_Interfaz',)),
+    ('idx_maneja_interfaz', 'Maneja', ('ID_Interfaz',)),
+)
+
+# Índices de versiones anteriores que otro de INDICES ya cubre
+INDICES_OBSOLETOS = (
+    'idx_establece_configuracion_canal',
+)
+
+def crear_indices(database: Database) -> None:
+    """
+    Crea los índices de búsqueda que falten en la base de datos y elimina
+    los de INDICES_OBSOLETOS.
+
+    Args:
+        database (Database): Base de datos sobre la que crear los índices
+    """
+    with database.atomic('IMMEDIATE'):
+        for nombre in INDICES_OBSOLETOS:
+            database.execute_sql(f'DROP INDEX IF EXISTS "{nombre}"')
+        for nombre, tabla, columnas in INDICES:
+            database.execute_sql(
+                f'CREATE INDEX IF NOT EXISTS "{nombre}" '
+                f'ON "{tabla}" ({", ".join(columnas)})'
+            )
+    logger.info("Índices de la base de datos verificados")
+
+# Tablas FTS5 de contenido externo: tabla -> (clave primaria, columnas indexadas).
+# Cada una se llama <tabla>_FTS. El tokenizador trigram permite buscar
+# subcadenas de tres o más caracteres sin recorrer la tabla.
+BUSQUEDAS_TEXTO = {
+    'Canal': ('Codigo_Canal', ('Etiqueta',)),
+    'Dispositivo': ('ID_Dispositivo', ('Nombre', 'Descripcion')),
+    'Tipo': ('ID_Tipo', ('Nombre', 'Descripcion')),
+}
+
+def _sentencias_busqueda(tabla: str, clave: str, columnas: tuple) -> tuple:
+    """
+    Genera la tabla FTS5 de una tabla y los triggers que la sincronizan.
+    """
+    fts = f'{tabla}_FTS'
+    lista = ', '.join(columnas)
+    nuevos = ', '.join(f'new.{c}' for c in columnas)
+    viejos = ', '.join(f'old.{c}' for c in columnas)
+    return (
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5(
+            {lista},
+            content='{tabla}', content_rowid='{clave}',
+            tokenize='trigram'
+        )''',
+        f'''CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{tabla}" BEGIN
+            INSERT INTO "{fts}"(rowid, {lista}) VALUES (new.{clave}, {nuevos});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{tabla}" BEGIN
+            INSERT INTO "{fts}"("{fts}", rowid, {lista}) VALUES ('delete', old.{clave}, {viejos});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE ON "{tabla}" BEGIN
+            INSERT INTO "{fts}"("{fts}", rowid, {lista}) VALUES ('delete', old.{clave}, {viejos});
+            INSERT INTO "{fts}"(rowid, {lista}) VALUES (new.{clave}, {nuevos});
+        END''',
+    )
+
+def crear_busquedas_texto(database: Database) -> None:
+    """
+    Crea los índices de texto completo de BUSQUEDAS_TEXTO y los triggers que
+    los mantienen sincronizados. La primera vez los llena con los datos
+    existentes.
+
+    Args:
+        database (Database): Base de datos sobre la que crear los índices
+    """
+    with database.atomic('IMMEDIATE'):
+        for tabla, (clave, columnas) in BUSQUEDAS_TEXTO.items():
+            fts = f'{tabla}_FTS'
+            existia = database.table_exists(fts)
+            for sentencia in _sentencias_busqueda(tabla, clave, columnas):
+                database.execute_sql(sentencia)
+            if not existia:
+                database.execute_sql(f'''INSERT INTO "{fts}"("{fts}") VALUES ('rebuild')''')
+                logger.info(f"Índice de búsqueda {fts} creado")
@@ -4,14 +4,11 @@ from datetime import datetime
 from peewee import (
     CharField,
     IntegerField,
-    DateTimeField,
-    DatabaseError
+    DatabaseError,
+    chunked
 )
 
-# from model.configuracion import Configuracion
-# from model.entrada import Entrada
-from model.base import BaseModel
-# from model.configuracion import Conectado
+from model.base import BaseModel, coincide_texto, TAMANO_LOTE_INSERCION
 
 class Dispositivo(BaseModel):
     """
@@ -82,6 +79,37 @@ class Dispositivo(BaseModel):
         except DatabaseError as e:
             raise DatabaseError(f"Error al crear el dispositivo: {str(e)}")
 
+    @classmethod
+    def crear_dispositivos(cls, dispositivos: List[dict]) -> int:
+        """
+        Crea varios dispositivos en una sola transacción, insertando por lotes.
+        
+        Args:
+            dispositivos (List[dict]): Diccionarios con 'nombre' y, opcionalmente,
+                'descripcion' de cada dispositivo
+            
+        Returns:
+            int: Número de dispositivos creados
+            
+        Raises:
+            ValueError: Si algún nombre está vacío
+            DatabaseError: Si hay un error en la creación de los dispositivos
+        """
+        filas = [
+            (dispositivo.get('nombre'), dispositivo.get('descripcion'))
+            for dispositivo in dispositivos
+        ]
+        if not all(nombre for nombre, _ in filas):
+            raise ValueError("El nombre del dispositivo no puede estar vacío")
+        
+        try:
+            with cls._meta.database.atomic('IMMEDIATE'):
+                for lote in chunked(filas, TAMANO_LOTE_INSERCION):
+                    cls.insert_many(lote, fields=[cls.nombre, cls.descripcion]).execute()
+            return len(filas)
+        except DatabaseError as e:
+            raise DatabaseError(f"Error al crear los dispositivos: {str(e)}")
+
     def get_entradas_activas(self, configuracion_id: Optional[int] = None):
         """
         Obtiene las entradas a las que está conectado este dispositivo.
@@ -104,7 +132,7 @@ class Dispositivo(BaseModel):
         if configuracion_id is not None:
             query = query.where(Conectado.configuracion == configuracion_id)
         
-        return list(query.distinct())
+        return list(query.distinct().iterator())
 
     def conectar_a_entrada(
         self,
@@ -228,16 +256,24 @@ class Dispositivo(BaseModel):
         Returns:
             dict: Representación en diccionario del dispositivo
         """
+        from model.entrada import Entrada
+        from model.configuracion import Conectado
+
+        # Las filas se serializan de inmediato, así que se leen como
+        # diccionarios en lugar de construir una instancia de Entrada por fila
+        entradas_activas = (Entrada
+                            .select(Entrada.id_entrada.alias('id'), Entrada.etiqueta)
+                            .join(Conectado, on=(Conectado.entrada == Entrada.id_entrada))
+                            .where(Conectado.dispositivo == self.id_dispositivo)
+                            .distinct()
+                            .dicts())
         return {
             'id': self.id_dispositivo,
             'nombre': self.nombre,
             'descripcion': self.descripcion,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'entradas_activas': [
-                {'id': e.id, 'etiqueta': e.etiqueta}
-                for e in self.get_entradas_activas()
-            ]
+            'entradas_activas': list(entradas_activas)
         }
 
     @classmethod
@@ -245,13 +281,22 @@ class Dispositivo(BaseModel):
         """
         Busca dispositivos por coincidencia parcial de nombre.
         
+        Las búsquedas de tres o más caracteres usan el índice de texto
+        completo Dispositivo_FTS (ver model.database_schema); las más cortas
+        no pueden formar un trigrama y recurren a LIKE.
+        
         Args:
             nombre (str): Texto a buscar en los nombres
             
         Returns:
             List[Dispositivo]: Lista de dispositivos que coinciden con la búsqueda
         """
-        return cls.select().where(cls.nombre.contains(nombre))
+        # Sin texto no hay nada que filtrar; se evita el LIKE '%%' sobre cada fila
+        if not nombre:
+            return cls.select()
+        if len(nombre) < 3:
+            return cls.select().where(cls.nombre.contains(nombre))
+        return cls.select().where(coincide_texto(cls.id_dispositivo, 'Nombre', nombre))
 
     def __str__(self) -> str:
         """
@@ -1,19 +1,14 @@
 from typing import List, Optional
-from datetime import datetime
 
 from peewee import (
     CharField,
     ForeignKeyField,
     DeferredForeignKey,
     IntegerField,
-    DatabaseError,
-    JOIN
+    DatabaseError
 )
 
-from model.base import BaseModel
-# from model.configuracion import Conectado, Configuracion
-# from model.dispositivo import Dispositivo
-# from model.interfaz_audio import InterfazAudio
+from model.base import BaseModel, coincide_prefijo
 
 class Entrada(BaseModel):
     """
@@ -93,17 +88,15 @@ class Entrada(BaseModel):
             Optional[Dispositivo]: Dispositivo conectado o None si no hay ninguno
         """
         from model.configuracion import Conectado
-        try:
-            conectado = (Conectado
-                        .select()
-                        .where(
-                            (Conectado.entrada == self) & 
-                            (Conectado.configuracion == configuracion_id)
-                        )
-                        .get())
-            return conectado.dispositivo
-        except Conectado.DoesNotExist:
-            return None
+        from model.dispositivo import Dispositivo
+        return (Dispositivo
+                .select()
+                .join(Conectado, on=(Conectado.dispositivo == Dispositivo.id_dispositivo))
+                .where(
+                    (Conectado.entrada == self.id_entrada) &
+                    (Conectado.configuracion == configuracion_id)
+                )
+                .first())
 
     def set_dispositivo_configuracion(
         self,
@@ -200,27 +193,35 @@ class Entrada(BaseModel):
         Returns:
             dict: Representación en diccionario de la entrada
         """
+        from model.interfaz_audio import InterfazAudio
         return {
             'id': self.id_entrada,
             'etiqueta': self.etiqueta,
             'descripcion': self.descripcion,
-            'interfaces_compatibles': [
-                {'id': i.id, 'nombre': i.nombre_comercial}
-                for i in self.get_interfaces_compatibles()
-            ]
+            'interfaces_compatibles': list(self.get_interfaces_compatibles()
+                .select(InterfazAudio.id_interfaz.alias('id'),
+                        InterfazAudio.nombre_comercial.alias('nombre'))
+                .dicts())
         }
 
     @classmethod
-    def buscar_por_etiqueta(cls, etiqueta: str) -> List['Entrada']:
+    def buscar_por_etiqueta(cls, etiqueta: str, prefijo: bool = False) -> List['Entrada']:
         """
         Busca entradas por coincidencia parcial de etiqueta.
         
         Args:
             etiqueta (str): Texto a buscar en las etiquetas
+            prefijo (bool): Si es True, busca solo las etiquetas que empiezan por
+                el texto, distinguiendo mayúsculas, usando el índice
             
         Returns:
             List[Entrada]: Lista de entradas que coinciden con la búsqueda
         """
+        # Sin texto no hay nada que filtrar; se evita el LIKE '%%' sobre cada fila
+        if not etiqueta:
+            return cls.select()
+        if prefijo:
+            return cls.select().where(coincide_prefijo(cls.etiqueta, etiqueta))
         return cls.select().where(cls.etiqueta.contains(etiqueta))
 
     @classmethod
@@ -235,11 +236,12 @@ class Entrada(BaseModel):
             List[Entrada]: Lista de entradas asociadas al dispositivo
         """
         from model.configuracion import Conectado
-        return (cls
-                .select()
-                .join(Conectado)
-                .where(Conectado.dispositivo == dispositivo_id)
-                .distinct())
+        return list(cls
+                    .select()
+                    .join(Conectado, on=(Conectado.entrada == cls.id_entrada))
+                    .where(Conectado.dispositivo == dispositivo_id)
+                    .distinct()
+                    .iterator())
 
     def __str__(self) -> str:
         """
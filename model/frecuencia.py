@@ -4,12 +4,14 @@ from datetime import datetime
 from peewee import (
     FloatField,
     IntegerField,
-    DateTimeField,
-    DatabaseError
+    DatabaseError,
+    chunked
 )
 
-# from model.interfaz_audio import InterfazAudio
-from model.base import BaseModel
+from model.base import BaseModel, TAMANO_LOTE_INSERCION
+
+# Frecuencias de muestreo comunes en kHz
+FRECUENCIAS_COMUNES_KHZ = (44.1, 48.0, 88.2, 96.0, 176.4, 192.0)
 
 class Frecuencia(BaseModel):
     """
@@ -68,6 +70,34 @@ class Frecuencia(BaseModel):
         except DatabaseError as e:
             raise DatabaseError(f"Error al crear la frecuencia: {str(e)}")
 
+    @classmethod
+    def crear_frecuencias(cls, valores: List[float]) -> int:
+        """
+        Crea varias frecuencias en una sola transacción, insertando por lotes.
+        
+        Args:
+            valores (List[float]): Valores de las frecuencias en kHz
+            
+        Returns:
+            int: Número de frecuencias creadas
+            
+        Raises:
+            ValueError: Si algún valor es inválido
+            DatabaseError: Si hay un error en la creación
+        """
+        if not all(cls.es_valor_valido(valor) for valor in valores):
+            raise ValueError(
+                "El valor de frecuencia debe ser positivo y estar en un rango válido (8-192 kHz)"
+            )
+        
+        try:
+            with cls._meta.database.atomic('IMMEDIATE'):
+                for lote in chunked(valores, TAMANO_LOTE_INSERCION):
+                    cls.insert_many([(valor,) for valor in lote], fields=[cls.valor]).execute()
+            return len(valores)
+        except DatabaseError as e:
+            raise DatabaseError(f"Error al crear las frecuencias: {str(e)}")
+
     @staticmethod
     def es_valor_valido(valor: float) -> bool:
         """
@@ -103,17 +133,20 @@ class Frecuencia(BaseModel):
         Returns:
             List[Frecuencia]: Lista de frecuencias comunes
         """
-        frecuencias_comunes = [44.1, 48.0, 88.2, 96.0, 176.4, 192.0]
-        resultado = []
+        # La columna Valor no tiene restricción UNIQUE en la base de datos, así
+        # que en lugar de get_or_create por valor (que depende de capturar
+        # IntegrityError) se consultan todas de una vez y se insertan las que falten
+        existentes = {}
+        for frecuencia in cls.select().where(cls.valor.in_(FRECUENCIAS_COMUNES_KHZ)).iterator():
+            existentes.setdefault(frecuencia.valor, frecuencia)
         
-        for valor in frecuencias_comunes:
-            frecuencia, _ = cls.get_or_create(
-                valor=valor,
-                defaults={'valor': valor}
-            )
-            resultado.append(frecuencia)
+        faltantes = [valor for valor in FRECUENCIAS_COMUNES_KHZ if valor not in existentes]
+        if faltantes:
+            cls.crear_frecuencias(faltantes)
+            for frecuencia in cls.select().where(cls.valor.in_(faltantes)).iterator():
+                existentes.setdefault(frecuencia.valor, frecuencia)
         
-        return resultado
+        return [existentes[valor] for valor in FRECUENCIAS_COMUNES_KHZ]
 
     @classmethod
     def get_por_valor(cls, valor: float) -> Optional['Frecuencia']:
@@ -126,10 +159,36 @@ class Frecuencia(BaseModel):
         Returns:
             Optional[Frecuencia]: Frecuencia encontrada o None
         """
-        try:
-            return cls.get(cls.valor == valor)
-        except cls.DoesNotExist:
+        return cls.select().where(cls.valor == valor).first()
+
+    @classmethod
+    def get_mas_cercana(cls, valor: float) -> Optional['Frecuencia']:
+        """
+        Obtiene la frecuencia registrada más cercana a un valor.
+        
+        Busca el mayor valor por debajo y el menor por encima del objetivo,
+        de modo que ambas consultas usan el índice sobre valor en lugar de
+        ordenar toda la tabla por la distancia.
+        
+        Args:
+            valor (float): Valor de referencia en kHz
+            
+        Returns:
+            Optional[Frecuencia]: Frecuencia más cercana o None si no hay ninguna
+        """
+        inferior = (cls.select()
+                    .where(cls.valor <= valor)
+                    .order_by(cls.valor.desc())
+                    .first())
+        superior = (cls.select()
+                    .where(cls.valor >= valor)
+                    .order_by(cls.valor.asc())
+                    .first())
+        
+        candidatas = [f for f in (inferior, superior) if f is not None]
+        if not candidatas:
             return None
+        return min(candidatas, key=lambda f: abs(f.valor - valor))
 
     def get_frecuencias_relacionadas(self) -> List['Frecuencia']:
         """
@@ -145,10 +204,12 @@ class Frecuencia(BaseModel):
             self.valor / 2
         ]
         
-        return [
-            freq for freq in Frecuencia.select()
-            .where(Frecuencia.valor.in_(valores_relacionados))
-        ]
+        # iterator() evita guardar las filas en la caché de la consulta
+        # además de en la lista devuelta
+        return list(Frecuencia
+                    .select()
+                    .where(Frecuencia.valor.in_(valores_relacionados))
+                    .iterator())
 
     def to_dict(self) -> dict:
         """
@@ -157,16 +218,17 @@ class Frecuencia(BaseModel):
         Returns:
             dict: Representación en diccionario de la frecuencia
         """
+        from model.interfaz_audio import InterfazAudio
         return {
             'id': self.id_frecuencia,
             'valor': self.valor,
             'valor_formateado': f"{self.valor} kHz",
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'interfaces_compatibles': [
-                {'id': i.id_interfaz, 'nombre': i.nombre_comercial}
-                for i in self.get_interfaces()
-            ]
+            'interfaces_compatibles': list(self.get_interfaces()
+                .select(InterfazAudio.id_interfaz.alias('id'),
+                        InterfazAudio.nombre_comercial.alias('nombre'))
+                .dicts())
         }
 
     @classmethod
@@ -185,10 +247,10 @@ class Frecuencia(BaseModel):
         Returns:
             List[Frecuencia]: Lista de frecuencias en el rango
         """
-        return cls.select().where(
+        return list(cls.select().where(
             (cls.valor >= valor_min) &
             (cls.valor <= valor_max)
-        ).order_by(cls.valor)
+        ).order_by(cls.valor).iterator())
 
     def save(self, *args, **kwargs):
         """
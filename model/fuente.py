@@ -1,18 +1,16 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import Optional
+import logging
 
 from peewee import (
     IntegerField,
     ForeignKeyField,
     DeferredForeignKey,
-    DateTimeField,
     DatabaseError
 )
 
-# from model.canal import Canal
-# from model.interfaz_audio import InterfazAudio
 from model.base import BaseModel, database_connection
-# from model.tipo import Tipo
+
+logger = logging.getLogger(__name__)
 
 class Fuente(BaseModel):
     """
@@ -86,10 +84,23 @@ class Fuente(BaseModel):
                             .where(Clasifica.fuente == self.id_fuente)
                             .first())
                 return clasifica.tipo if clasifica else None
-            except Exception as e:
-                print(f"Error al obtener tipo de fuente: {e}")
+            except DatabaseError as e:
+                logger.error(f"Error al obtener tipo de fuente: {e}")
                 return None
 
+    def get_id_tipo(self) -> Optional[int]:
+        """
+        Obtiene el ID del tipo asociado a esta fuente sin cargar el Tipo.
+        
+        Returns:
+            Optional[int]: ID del tipo de la fuente o None si no tiene tipo
+        """
+        return (Clasifica
+                .select(Clasifica.tipo)
+                .where(Clasifica.fuente == self.id_fuente)
+                .limit(1)
+                .scalar())
+
     def set_tipo(self, tipo_id: int) -> bool:
         """
         Establece el tipo de la fuente.
@@ -191,6 +202,8 @@ class Fuente(BaseModel):
         Returns:
             dict: Representación en diccionario de la fuente
         """
+        from model.canal import Canal
+        from model.interfaz_audio import InterfazAudio
         tipo = self.get_tipo()
         return {
             'id': self.id_fuente,
@@ -199,14 +212,13 @@ class Fuente(BaseModel):
                 'nombre': tipo.nombre,
                 'descripcion': tipo.descripcion
             } if tipo else None,
-            'interfaces_compatibles': [
-                {'id': i.id_interfaz, 'nombre': i.nombre_comercial}
-                for i in self.get_interfaces_compatibles()
-            ],
-            'canales': [
-                {'id': c.codigo_canal, 'etiqueta': c.etiqueta}
-                for c in self.get_canales()
-            ],
+            'interfaces_compatibles': list(self.get_interfaces_compatibles()
+                .select(InterfazAudio.id_interfaz.alias('id'),
+                        InterfazAudio.nombre_comercial.alias('nombre'))
+                .dicts()),
+            'canales': list(self.get_canales()
+                .select(Canal.codigo_canal.alias('id'), Canal.etiqueta)
+                .dicts()),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
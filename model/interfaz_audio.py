@@ -6,15 +6,12 @@ from peewee import (
     CharField,
     DecimalField,
     IntegerField,
-    DateTimeField,
     ForeignKeyField,
-    DatabaseError
+    DatabaseError,
+    fn
 )
 
 from model.base import BaseModel
-# from model.entrada import Permite
-# from model.frecuencia import Frecuencia
-# from model.fuente import Fuente
 
 class InterfazAudio(BaseModel):
     """
@@ -92,7 +89,7 @@ class InterfazAudio(BaseModel):
             ValueError: Si algún parámetro requerido está vacío o es inválido
             DatabaseError: Si hay un error en la creación
         """
-        from model.frecuencia import Frecuencia, InterfazFrecuencia
+        from model.frecuencia import Frecuencia
         if not all([nombre_corto, modelo, nombre_comercial]):
             raise ValueError("Todos los campos de nombre son requeridos")
         
@@ -100,20 +97,31 @@ class InterfazAudio(BaseModel):
             raise ValueError("El precio debe ser mayor que 0")
         
         try:
-            interfaz = cls.create(
-                nombre_corto=nombre_corto,
-                modelo=modelo,
-                nombre_comercial=nombre_comercial,
-                precio=precio
-            )
-            
-            if frecuencias:
-                for freq in frecuencias:
-                    frecuencia = Frecuencia.get_or_create(valor=freq)[0]
-                    InterfazFrecuencia.create(
-                        interfaz=interfaz,
-                        frecuencia=frecuencia
-                    )
+            # La interfaz y sus frecuencias se crean en una sola transacción
+            with cls._meta.database.atomic('IMMEDIATE'):
+                interfaz = cls.create(
+                    nombre_corto=nombre_corto,
+                    modelo=modelo,
+                    nombre_comercial=nombre_comercial,
+                    precio=precio
+                )
+                
+                if frecuencias:
+                    # Resolver todas las frecuencias con una consulta y crear las que falten
+                    ids_por_valor = {}
+                    consulta = Frecuencia.select(Frecuencia.valor, Frecuencia.id_frecuencia)
+                    for valor, id_frecuencia in consulta.where(Frecuencia.valor.in_(frecuencias)).tuples():
+                        ids_por_valor.setdefault(valor, id_frecuencia)
+                    faltantes = [valor for valor in dict.fromkeys(frecuencias) if valor not in ids_por_valor]
+                    if faltantes:
+                        Frecuencia.crear_frecuencias(faltantes)
+                        for valor, id_frecuencia in consulta.where(Frecuencia.valor.in_(faltantes)).tuples():
+                            ids_por_valor.setdefault(valor, id_frecuencia)
+                    
+                    InterfazFrecuencia.insert_many(
+                        [(interfaz.id_interfaz, ids_por_valor[valor]) for valor in dict.fromkeys(frecuencias)],
+                        fields=[InterfazFrecuencia.interfaz, InterfazFrecuencia.frecuencia]
+                    ).execute()
             
             return interfaz
             
@@ -133,7 +141,6 @@ class InterfazAudio(BaseModel):
         Raises:
             DatabaseError: Si hay un error al agregar la entrada
         """
-        from model.entrada import Entrada
         from model.entrada import Permite
         try:
             Permite.create(
@@ -151,9 +158,16 @@ class InterfazAudio(BaseModel):
         Returns:
             List[float]: Lista de frecuencias soportadas en Hz
         """
+        from model.frecuencia import Frecuencia
+        # Un solo JOIN en lugar de una consulta de Frecuencia por cada relación
         return [
-            if_freq.frecuencia.valor
-            for if_freq in self.interfaz_frecuencia_set
+            valor
+            for (valor,) in (Frecuencia
+                             .select(Frecuencia.valor)
+                             .join(InterfazFrecuencia)
+                             .where(InterfazFrecuencia.interfaz == self.id_interfaz)
+                             .order_by(Frecuencia.valor)
+                             .tuples())
         ]
 
     def get_entradas_disponibles(self):
@@ -242,6 +256,48 @@ class InterfazAudio(BaseModel):
         self.save()
         return True
 
+    @classmethod
+    def get_resumen_precios(
+        cls,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None
+    ) -> dict:
+        """
+        Calcula cuántas interfaces hay y su precio mínimo, máximo y medio,
+        opcionalmente dentro de un rango de precios.
+        
+        Los agregados se calculan en SQLite con una sola consulta, sin crear
+        una instancia de InterfazAudio por fila.
+        
+        Args:
+            precio_min (Optional[Decimal]): Precio mínimo incluido
+            precio_max (Optional[Decimal]): Precio máximo incluido
+            
+        Returns:
+            dict: Claves 'cantidad', 'minimo', 'maximo' y 'promedio'; los
+                precios son Decimal con dos decimales, o None si no hay
+                interfaces en el rango
+        """
+        query = cls.select(
+            fn.COUNT(cls.id_interfaz).alias('cantidad'),
+            fn.MIN(cls.precio).alias('minimo'),
+            fn.MAX(cls.precio).alias('maximo'),
+            fn.AVG(cls.precio).alias('promedio')
+        )
+        if precio_min is not None:
+            query = query.where(cls.precio >= precio_min)
+        if precio_max is not None:
+            query = query.where(cls.precio <= precio_max)
+        resumen = query.dicts().get()
+
+        # peewee no convierte el resultado de AVG, que SQLite da como float;
+        # se pasa a Decimal con los decimales de la columna, igual que MIN y MAX
+        if resumen['promedio'] is not None:
+            resumen['promedio'] = Decimal(str(resumen['promedio'])).quantize(
+                Decimal(10) ** -cls.precio.decimal_places
+            )
+        return resumen
+
     def to_dict(self) -> dict:
         """
         Convierte la interfaz a un diccionario para serialización.
@@ -249,6 +305,7 @@ class InterfazAudio(BaseModel):
         Returns:
             dict: Representación en diccionario de la interfaz
         """
+        from model.entrada import Entrada
         return {
             'id': self.id_interfaz,
             'nombre_corto': self.nombre_corto,
@@ -256,10 +313,9 @@ class InterfazAudio(BaseModel):
             'nombre_comercial': self.nombre_comercial,
             'precio': float(self.precio),
             'frecuencias_soportadas': self.get_frecuencias_soportadas(),
-            'entradas_disponibles': [
-                {'id': e.id, 'etiqueta': e.etiqueta}
-                for e in self.get_entradas_disponibles()
-            ],
+            'entradas_disponibles': list(self.get_entradas_disponibles()
+                .select(Entrada.id_entrada.alias('id'), Entrada.etiqueta)
+                .dicts()),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -4,14 +4,11 @@ from datetime import datetime
 from peewee import (
     CharField,
     IntegerField,
-    DateTimeField,
-    DatabaseError
+    DatabaseError,
+    chunked
 )
 
-# from model.canal import Canal
-# from model.fuente import Fuente
-from model.base import BaseModel
-# from model.fuente import Clasifica
+from model.base import BaseModel, coincide_prefijo, coincide_texto, TAMANO_LOTE_INSERCION
 
 class Tipo(BaseModel):
     """
@@ -87,6 +84,55 @@ class Tipo(BaseModel):
         except DatabaseError as e:
             raise DatabaseError(f"Error al crear el tipo: {str(e)}")
 
+    @classmethod
+    def crear_tipos(cls, tipos: List[dict]) -> List[int]:
+        """
+        Crea varios tipos de fuente en una sola transacción, insertando por
+        lotes y obteniendo los IDs generados con INSERT ... RETURNING.
+        
+        Args:
+            tipos (List[dict]): Diccionarios con 'nombre' y, opcionalmente,
+                'descripcion' de cada tipo
+            
+        Returns:
+            List[int]: IDs de los tipos creados, en el mismo orden
+            
+        Raises:
+            ValueError: Si algún nombre está vacío, repetido o ya existe
+            DatabaseError: Si hay un error en la creación
+        """
+        filas = [
+            ((tipo.get('nombre') or '').strip(), tipo.get('descripcion'))
+            for tipo in tipos
+        ]
+        nombres = [nombre for nombre, _ in filas]
+        if not all(nombres):
+            raise ValueError("El nombre del tipo no puede estar vacío")
+        if len(set(nombres)) != len(nombres):
+            raise ValueError("Hay nombres de tipo repetidos")
+        
+        try:
+            ids = []
+            # La comprobación de nombres existentes y las inserciones comparten
+            # el bloqueo de escritura, así que nadie puede crear el mismo nombre
+            # entre ambas
+            with cls._meta.database.atomic('IMMEDIATE'):
+                existente = cls.select(cls.nombre).where(cls.nombre.in_(nombres)).scalar()
+                if existente is not None:
+                    raise ValueError(f"Ya existe un tipo con el nombre '{existente}'")
+
+                for lote in chunked(filas, TAMANO_LOTE_INSERCION):
+                    ids.extend(
+                        id_tipo for (id_tipo,) in cls
+                        .insert_many(lote, fields=[cls.nombre, cls.descripcion])
+                        .returning(cls.id_tipo)
+                        .tuples()
+                        .execute()
+                    )
+            return ids
+        except DatabaseError as e:
+            raise DatabaseError(f"Error al crear los tipos: {str(e)}")
+
     def get_fuentes(self):
         """
         Obtiene todas las fuentes clasificadas con este tipo.
@@ -168,7 +214,8 @@ class Tipo(BaseModel):
         Raises:
             ValueError: Si el tipo tiene fuentes asociadas
         """
-        if self.get_fuentes():
+        from model.fuente import Clasifica
+        if Clasifica.select().where(Clasifica.tipo == self.id_tipo).exists():
             raise ValueError(
                 "No se puede eliminar el tipo porque tiene fuentes asociadas"
             )
@@ -188,22 +235,35 @@ class Tipo(BaseModel):
             'descripcion': self.descripcion,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'cantidad_fuentes': len(self.get_fuentes()),
-            'cantidad_canales': len(self.get_canales_asociados())
+            'cantidad_fuentes': self.get_fuentes().count(),
+            'cantidad_canales': self.get_canales_asociados().count()
         }
 
     @classmethod
-    def buscar_por_nombre(cls, nombre: str) -> List['Tipo']:
+    def buscar_por_nombre(cls, nombre: str, prefijo: bool = False) -> List['Tipo']:
         """
         Busca tipos por coincidencia parcial de nombre.
         
+        Las búsquedas de tres o más caracteres usan el índice de texto
+        completo Tipo_FTS (ver model.database_schema); las más cortas no
+        pueden formar un trigrama y recurren a LIKE.
+        
         Args:
             nombre (str): Texto a buscar en los nombres
+            prefijo (bool): Si es True, busca solo los nombres que empiezan por
+                el texto, distinguiendo mayúsculas, usando el índice
             
         Returns:
             List[Tipo]: Lista de tipos que coinciden con la búsqueda
         """
-        return cls.select().where(cls.nombre.contains(nombre))
+        # Sin texto no hay nada que filtrar; se evita el LIKE '%%' sobre cada fila
+        if not nombre:
+            return cls.select()
+        if prefijo:
+            return cls.select().where(coincide_prefijo(cls.nombre, nombre))
+        if len(nombre) < 3:
+            return cls.select().where(cls.nombre.contains(nombre))
+        return cls.select().where(coincide_texto(cls.id_tipo, 'Nombre', nombre))
 
     @classmethod
     def get_tipos_utilizados(cls) -> List['Tipo']:
@@ -214,10 +274,11 @@ class Tipo(BaseModel):
             List[Tipo]: Lista de tipos con fuentes asociadas
         """
         from model.fuente import Clasifica
-        return (cls
-                .select()
-                .join(Clasifica)
-                .distinct())
+        return list(cls
+                    .select()
+                    .join(Clasifica, on=(Clasifica.tipo == cls.id_tipo))
+                    .distinct()
+                    .iterator())
 
     def __str__(self) -> str:
         """
@@ -231,4 +292,4 @@ class Tipo(BaseModel):
         """
         return (f"Tipo(id={self.id_tipo}, "
                 f"nombre={self.nombre}, "
-                f"fuentes={len(self.get_fuentes())})")
\ No newline at end of file
+                f"fuentes={self.get_fuentes().count()})")
\ No newline at end of file
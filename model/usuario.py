@@ -1,13 +1,47 @@
 from datetime import datetime
+import os
 import re
-from typing import List
+from typing import Optional, TYPE_CHECKING
 
-from peewee import CharField, DateTimeField, ForeignKeyField, DeferredForeignKey, IntegerField
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from peewee import CharField, ForeignKeyField, DeferredForeignKey, IntegerField
 
 from model.base import BaseModel
 
+if TYPE_CHECKING:
+    from argon2 import PasswordHasher
+
+_password_hasher = None
+_hash_ficticio = None
+
+def _get_password_hasher() -> 'PasswordHasher':
+    """
+    Obtiene el hasher de contraseñas, único para todo el proceso.
+    
+    argon2 se importa aquí y no al cargar el módulo, para que los arranques
+    que no manejan contraseñas no carguen su extensión nativa. El coste de
+    Argon2 puede ajustarse con variables de entorno; por defecto se usan los
+    valores de argon2-cffi.
+    """
+    global _password_hasher
+    if _password_hasher is None:
+        from argon2 import PasswordHasher
+        por_defecto = PasswordHasher()
+        _password_hasher = PasswordHasher(
+            time_cost=int(os.environ.get('ARGON2_TIME_COST', por_defecto.time_cost)),
+            memory_cost=int(os.environ.get('ARGON2_MEMORY_COST', por_defecto.memory_cost))
+        )
+    return _password_hasher
+
+def _get_hash_ficticio() -> str:
+    """
+    Obtiene un hash de referencia, calculado una sola vez, contra el que
+    verificar cuando el email no existe.
+    """
+    global _hash_ficticio
+    if _hash_ficticio is None:
+        _hash_ficticio = _get_password_hasher().hash('contraseña-ficticia')
+    return _hash_ficticio
+
 class Usuario(BaseModel):
     """
     Modelo que representa un usuario en el sistema de la consola de audio.
@@ -72,14 +106,51 @@ class Usuario(BaseModel):
                 "incluir mayúsculas, minúsculas y números"
             )
         
-        ph = PasswordHasher()
-        hashed_password = ph.hash(password)
+        hashed_password = _get_password_hasher().hash(password)
         
         return cls.create(
             email=email.lower(),
             password=hashed_password
         )
     
+    @classmethod
+    def autenticar(cls, email: str, password: str) -> Optional['Usuario']:
+        """
+        Autentica un usuario por email y contraseña.
+        
+        Si el email no existe se verifica igualmente contra un hash ficticio,
+        de modo que la respuesta tarda lo mismo que con una contraseña
+        incorrecta y no revela qué emails están registrados.
+        
+        El hash guarda los parámetros de Argon2 con los que se calculó; si no
+        coinciden con los configurados, se recalcula con la contraseña recién
+        verificada.
+        
+        Args:
+            email (str): Email del usuario
+            password (str): Contraseña sin procesar
+            
+        Returns:
+            Optional[Usuario]: Usuario autenticado o None si las credenciales no son válidas
+        """
+        from argon2.exceptions import VerifyMismatchError
+
+        usuario = cls.select().where(cls.email == email.lower()).first()
+        if usuario is None:
+            try:
+                _get_password_hasher().verify(_get_hash_ficticio(), password)
+            except VerifyMismatchError:
+                pass
+            return None
+        if not usuario.verify_password(password):
+            return None
+
+        hasher = _get_password_hasher()
+        if hasher.check_needs_rehash(usuario.password):
+            usuario.password = hasher.hash(password)
+            usuario.save(only=[cls.password])
+        return usuario
+
     def verify_password(self, password: str) -> bool:
         """
         Verifica si la contraseña proporcionada coincide con la almacenada.
@@ -90,11 +161,12 @@ class Usuario(BaseModel):
         Returns:
             bool: True si la contraseña es correcta, False en caso contrario
         """
-        ph = PasswordHasher()
+        from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
         try:
-            ph.verify(self.password, password)
+            _get_password_hasher().verify(self.password, password)
             return True
-        except VerifyMismatchError:
+        except (VerifyMismatchError, InvalidHashError):
             return False
     
     def update_password(self, new_password: str) -> bool:
@@ -116,8 +188,7 @@ class Usuario(BaseModel):
                 "incluir mayúsculas, minúsculas y números"
             )
         
-        ph = PasswordHasher()
-        self.password = ph.hash(new_password)
+        self.password = _get_password_hasher().hash(new_password)
         self.updated_at = datetime.now()
         self.save()
         return True
@@ -130,7 +201,6 @@ class Usuario(BaseModel):
             List[Configuracion]: Lista de configuraciones del usuario
         """
         from model.configuracion import Configuracion
-        from model.usuario import Personaliza
 
         return (Configuracion
                 .select()